@@ -0,0 +1,110 @@
+""" Headless pipeline, every stl in a directory is loaded, reduced and laid
+    out into an svg cut sheet of the same name. no Tk or pygame involved
+
+    python batch.py source-files sheets --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from meshloader import model_from_file, DEFAULT_WELD_TOLERANCE
+from modelcache import ModelCache, get_default_cache_directory
+from placement import ModelPlacement
+from svgexport import export_svg
+from layout import DEFAULT_SHEET_SIZE
+
+def find_stl_files(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(".stl") and os.path.isfile(os.path.join(directory, name))
+    )
+
+def get_output_filename(filename, output_directory):
+    return os.path.join(output_directory, os.path.splitext(os.path.basename(filename))[0] + ".svg")
+
+def process_file(filename, output_directory, reduce=True, weld_tolerance=DEFAULT_WELD_TOLERANCE,
+        sheet_size=DEFAULT_SHEET_SIZE, allow_rotation=True, cache_directory=None):
+    """ process pool entry point, one stl in, an svg per sheet out
+        cache_directory: where imported and reduced models are cached, None
+        to always work from scratch
+        returns (output filenames, face count, seconds taken)
+    """
+    started = time.time()
+    reference = os.path.splitext(os.path.basename(filename))[0]
+    if None is cache_directory:
+        model = model_from_file(filename, weld_tolerance)
+        if reduce:
+            #the pool already keeps every cpu busy with one file each
+            model = model.get_reduced_model(1)
+    else:
+        cache = ModelCache(cache_directory)
+        model = cache.load_model(filename, weld_tolerance)
+        if reduce:
+            model = cache.get_reduced_model(model, 1)
+
+    outputs = export_svg(
+        get_output_filename(filename, output_directory),
+        [ModelPlacement(reference, model, (0,0,0), None)],
+        sheet_size=sheet_size,
+        allow_rotation=allow_rotation
+    )
+    return outputs, len(model.faces), time.time() - started
+
+def run_batch(filenames, output_directory, workers=None, reduce=True, weld_tolerance=DEFAULT_WELD_TOLERANCE,
+        sheet_size=DEFAULT_SHEET_SIZE, allow_rotation=True, cache_directory=None):
+    """ process every file across a pool of workers (None uses one per cpu)
+        prints a line per file as it finishes, returns the number of failures
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    failures = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        jobs = {
+            executor.submit(
+                process_file, filename, output_directory, reduce, weld_tolerance,
+                sheet_size, allow_rotation, cache_directory
+            ): filename
+            for filename in filenames
+        }
+        for job in as_completed(jobs):
+            filename = jobs[job]
+            try:
+                outputs, face_count, seconds = job.result()
+            except Exception as e:
+                failures = failures + 1
+                print("%s: failed, %s" % (filename, e), file=sys.stderr)
+            else:
+                print("%s -> %s (%i faces on %i sheets, %.2fs)" % (filename, outputs[0], face_count, len(outputs), seconds))
+
+    return failures
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Reduce every stl in a directory and export svg cut sheets")
+    parser.add_argument("input", help="directory of stl files")
+    parser.add_argument("output", help="directory the svg files are written to")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use, defaults to one per cpu")
+    parser.add_argument("--no-reduce", dest="reduce", action="store_false", help="export the triangles as they are")
+    parser.add_argument("--weld-tolerance", type=float, default=DEFAULT_WELD_TOLERANCE, help="distance (mm) under which vertices are merged")
+    parser.add_argument("--sheet-width", type=float, default=DEFAULT_SHEET_SIZE[0], help="sheet width (mm)")
+    parser.add_argument("--sheet-height", type=float, default=DEFAULT_SHEET_SIZE[1], help="sheet height (mm)")
+    parser.add_argument("--no-rotate", dest="rotate", action="store_false", help="keep parts in their flattened orientation")
+    parser.add_argument("--cache-dir", default=get_default_cache_directory(), help="where imported and reduced models are cached")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="don't read or write the model cache")
+    options = parser.parse_args(args)
+
+    if not os.path.isdir(options.input):
+        parser.error(options.input + " is not a directory")
+    filenames = find_stl_files(options.input)
+    if 0 == len(filenames):
+        parser.error("no stl files in " + options.input)
+
+    failures = run_batch(
+        filenames, options.output, options.workers, options.reduce, options.weld_tolerance,
+        (options.sheet_width, options.sheet_height), options.rotate,
+        options.cache_dir if options.cache else None
+    )
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,40 +1,224 @@
-import os,platform
+import os,platform,time
 from tkinter import *
 from tkinter import ttk
 from tkinter import filedialog
 from tkinter.ttk import Treeview
 
 import numpy as np
-from stl import mesh
-import svgwrite
 
 from meshloader import *
+from geometry import DEFAULT_REDUCTION_WORKERS, get_plane_keys
+from svgexport import export_svg
+from jobs import JobExecutor, JOB_PROGRESS, JOB_DONE, JOB_FAILED, JOB_CANCELLED
+from modelcache import ModelCache
+from project import save_project, load_project, unmap_model, get_viewport_settings, apply_viewport_settings
 from scene import Scene, SceneViewer, \
     SCENE_PERSPECTIVE_FRONT, \
     SCENE_PERSPECTIVE_TOP, \
     SCENE_PERSPECTIVE_LEFT, \
     SCENE_PERSPECTIVE_RIGHT, \
     SCENE_PERSPECTIVE_BOTTOM, \
-    SCENE_PERSPECTIVE_BACK
+    SCENE_PERSPECTIVE_BACK, \
+    RENDER_MODE_WIREFRAME, \
+    RENDER_MODE_SOLID
 
 DEFAULT_MODEL_CANVAS_DIMENSIONS = (600,600)
 DEFAULT_POLYGON_CANVAS_DIMENSIONS = (300,300)
 
+#redraws are coalesced down to at most this many per second
+MAX_FRAME_RATE = 30
+
+#how often (ms) background job messages are picked up
+JOB_POLL_INTERVAL = 50
+
+#rows the model explorer inserts at a time under any one node
+EXPLORER_PAGE_SIZE = 200
+
 DEBUG = False
 
+class RenderScheduler:
+    """ Coalesce redraw requests into at most one render per frame
+        request() only marks the scene dirty, the render itself runs later
+        from the Tk event loop, so input handling stays cheap
+    """
+    def __init__(self, root, render, max_frame_rate=MAX_FRAME_RATE):
+        self.root = root
+        self.render = render
+        self.frame_interval = 1.0 / max_frame_rate
+        self.pending = None
+        self.requests = 0
+        self.last_render = 0.0
+        self.frames_rendered = 0
+        self.frames_merged = 0
+
+    def request(self):
+        self.requests = self.requests + 1
+        if None is not self.pending:
+            return
+
+        #wait out the rest of the current frame before rendering again
+        wait = self.frame_interval - (time.time() - self.last_render)
+        self.pending = self.root.after(max(0, int(wait * 1000)), self.flush)
+
+    def flush(self):
+        """ render now if anything was requested """
+        if None is not self.pending:
+            self.root.after_cancel(self.pending)
+            self.pending = None
+        if 0 == self.requests:
+            return
+
+        merged = self.requests - 1
+        self.frames_merged = self.frames_merged + merged
+        self.requests = 0
+        self.render()
+        self.frames_rendered = self.frames_rendered + 1
+        #measured after rendering so a slow frame doesn't queue up the next one
+        self.last_render = time.time()
+
+        if DEBUG and merged:
+            print("render merged %i requests (%i frames, %i merged in total)" % \
+                (merged + 1, self.frames_rendered, self.frames_merged))
+
+    def get_stats(self):
+        return {
+            "rendered": self.frames_rendered,
+            "merged": self.frames_merged,
+            "pending": self.requests
+        }
+
+class ModelExplorer:
+    """ Treeview of the faces in a scene, filled in lazily
+        faces are grouped by plane (rounded normal), biggest groups first.
+        a group's faces are only inserted when it's expanded, and every node
+        gets at most EXPLORER_PAGE_SIZE rows at a time followed by a "more"
+        row, so the cost of showing a model doesn't grow with its face count
+    """
+    def __init__(self, tree, on_face_select):
+        self.tree = tree
+        self.on_face_select = on_face_select
+        self.scene = None
+        #item id -> (placement reference, entries, rows inserted so far, normal)
+        #entries are (start, end) group bounds under a model and face ids
+        #under a group
+        self.pending = {}
+        #placement reference -> (face ids sorted by group, unit normals)
+        self.groups = {}
+        #face item id -> (placement reference, face index)
+        self.faces = {}
+        tree.bind("<<TreeviewOpen>>", self.on_open)
+        tree.bind("<<TreeviewSelect>>", self.on_select)
+
+    def clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self.pending = {}
+        self.groups = {}
+        self.faces = {}
+
+    def update(self, scene):
+        self.clear()
+        self.scene = scene
+        for reference,model_placement in scene.model_placements.items():
+            self.tree.insert("", 1, reference, text=reference, open=True, tags=("model",))
+            normals = model_placement.model.get_unit_normals()
+            if 0 == len(normals):
+                continue
+
+            #faces sorted into plane groups, biggest group first
+            keys = get_plane_keys(normals)
+            sizes = np.bincount(keys)
+            order = np.lexsort((keys, -sizes[keys]))
+            starts = np.flatnonzero(np.diff(keys[order], prepend=-1))
+            bounds = np.stack((starts, np.append(starts[1:], len(order))), axis=1)
+            self.groups[reference] = (order, normals)
+            self.pending[reference] = (reference, bounds, 0, None)
+            self.populate(reference)
+
+    def populate(self, item):
+        """ insert the next page of rows under item """
+        reference, entries, offset, normal = self.pending[item]
+        tree = self.tree
+        #drop the placeholder / more row left by the last page
+        if tree.exists(item + "-more"):
+            tree.delete(item + "-more")
+
+        for entry in entries[offset:offset + EXPLORER_PAGE_SIZE]:
+            if None is normal:
+                order, normals = self.groups[reference]
+                face_ids = order[entry[0]:entry[1]]
+                group_normal = normals[face_ids[0]]
+                #single faces are listed straight away instead of as a group of one
+                if 1 == len(face_ids):
+                    self.insert_face(item, reference, int(face_ids[0]), group_normal)
+                    continue
+                group = item + "-g" + str(face_ids[0])
+                tree.insert(item, "end", group, text="%i faces" % len(face_ids), values=(self.format_normal(group_normal),), tags=("group",))
+                self.pending[group] = (reference, face_ids, 0, group_normal)
+                self.insert_more(group)
+            else:
+                self.insert_face(item, reference, int(entry), normal)
+
+        offset = offset + EXPLORER_PAGE_SIZE
+        self.pending[item] = (reference, entries, offset, normal)
+        if offset < len(entries):
+            self.insert_more(item, "%i more" % (len(entries) - offset))
+
+    def insert_face(self, parent, reference, index, normal):
+        face = reference + "-" + str(index)
+        self.tree.insert(
+            parent,
+            "end",
+            face,
+            text=self.scene.get_model_placement(reference).hash_face_by_index(index),
+            values=(self.format_normal(normal),),
+            tags=("face",)
+        )
+        self.faces[face] = (reference, index)
+
+    def insert_more(self, item, text="..."):
+        """ placeholder row, also what makes an unexpanded group openable """
+        self.tree.insert(item, "end", item + "-more", text=text, tags=("more",))
+
+    def on_open(self, event):
+        item = self.tree.focus()
+        if item in self.pending and 0 == self.pending[item][2]:
+            self.populate(item)
+
+    def on_select(self, event):
+        item = self.tree.focus()
+        if item in self.faces:
+            self.on_face_select(*self.faces[item])
+        elif self.tree.tag_has("more", item):
+            self.populate(self.tree.parent(item))
+
+    def format_normal(self, normal):
+        return "%.3f %.3f %.3f" % tuple(normal)
+
 class FaceYankerApp:
-    def __init__(self,master, test=False):
+    def __init__(self,master, test=False, reduction_workers=DEFAULT_REDUCTION_WORKERS):
         self.root = master
         self.model_screen = None
+        self.reduction_workers = reduction_workers
         self.init_ui()
         self.embed_sdl()
         self.scene = Scene()
         self.scene_viewer = SceneViewer(self.scene,DEFAULT_MODEL_CANVAS_DIMENSIONS)
+        self.render_scheduler = RenderScheduler(self.root, self.scene_viewer.update)
+        #pygame only pushes changed rects when idle, after being uncovered
+        #the whole window needs to be drawn again
+        self.model_frame.bind("<Expose>", self.on_model_frame_exposed)
+        self.model_frame.bind("<Visibility>", self.on_model_frame_exposed)
+        self.jobs = JobExecutor()
+        #imported and reduced models are kept on disk between sessions
+        self.model_cache = ModelCache()
+        self.poll_jobs()
         if test:
             self.test()
         else:
             self.root.mainloop()
 
+        self.jobs.shutdown()
+
         try:
             self.root.destroy()
         except:
@@ -47,6 +231,7 @@ class FaceYankerApp:
         frame.focus_set()
 
         self.init_menu(frame)
+        self.init_status_bar()
         self.polygon_view = self.init_polygon_view()
         self.clear_polygon_view()
         self.model_explorer = self.init_model_explorer()
@@ -56,6 +241,9 @@ class FaceYankerApp:
         self.root.config(menu=menubar)
 
         fileMenu = Menu(menubar)
+        fileMenu.add_command(label="Open Project", command=self.on_open_project, underline=0)
+        fileMenu.add_command(label="Save Project", command=self.on_save_project, underline=0)
+        fileMenu.add_separator()
         fileMenu.add_command(label="Import Model", command=self.on_open, accelerator="Ctrl+O", underline=0)
         fileMenu.add_command(label="Export SVG", command=self.on_export, accelerator="Ctrl+S", underline=0)
         fileMenu.add_command(label="Exit", command=frame.quit, accelerator="Ctrl+X", underline=1)
@@ -63,12 +251,17 @@ class FaceYankerApp:
 
         modelMenu = Menu(menubar)
         modelMenu.add_command(label="Reduce Model", command=self.on_flatten_model, underline=0)
+        modelMenu.add_command(label="Cancel Job", command=self.on_cancel_jobs, accelerator="Esc", underline=0)
         menubar.add_cascade(label="Model", menu=modelMenu, underline=0)
 
         viewMenu = Menu(menubar)
         viewMenu.add_command(label="Toggle Normals", underline=7, command=self.on_toggle_normals)
         viewMenu.add_command(label="Toggle Grid", underline=7, command=self.on_toggle_grid)
         viewMenu.add_command(label="Toggle Model Tree", underline=7, command=self.on_toggle_model_explorer)
+        viewMenu.add_command(label="Toggle Backface Culling", underline=7, command=self.on_toggle_cull_backfaces)
+        viewMenu.add_separator()
+        viewMenu.add_command(label="Wireframe", underline=0, command=lambda:self.on_set_render_mode(RENDER_MODE_WIREFRAME))
+        viewMenu.add_command(label="Solid", underline=1, command=lambda:self.on_set_render_mode(RENDER_MODE_SOLID))
         viewMenu.add_separator()
         viewMenu.add_command(label="Front View", underline=0, command=lambda:self.on_set_perspective(SCENE_PERSPECTIVE_FRONT))
         viewMenu.add_command(label="Top View", underline=0, command=lambda:self.on_set_perspective(SCENE_PERSPECTIVE_TOP))
@@ -79,6 +272,39 @@ class FaceYankerApp:
 
         menubar.add_cascade(label="View", menu=viewMenu, underline=0)
 
+    def init_status_bar(self):
+        """ progress of background jobs, packed first so it spans the bottom """
+        status_bar = Frame(self.root)
+        status_bar.pack(side=BOTTOM, fill="x")
+        self.status_text = StringVar(value="ready")
+        self.status_progress = ttk.Progressbar(status_bar, orient="horizontal", length=200, mode="determinate", maximum=1.0)
+        self.status_cancel = ttk.Button(status_bar, text="Cancel", command=self.on_cancel_jobs, state="disabled")
+        self.status_cancel.pack(side=RIGHT)
+        self.status_progress.pack(side=RIGHT)
+        Label(status_bar, textvariable=self.status_text, anchor="w").pack(side=LEFT, fill="x", expand=True)
+
+    def poll_jobs(self):
+        """ pick up messages from background jobs, finished jobs have their
+            callbacks run here on the Tk thread
+        """
+        #rescheduled first so a failing callback doesn't stop the polling
+        self.root.after(JOB_POLL_INTERVAL, self.poll_jobs)
+        for job,kind,value in self.jobs.poll():
+            if JOB_PROGRESS == kind:
+                fraction, message = value
+                self.status_progress["value"] = fraction
+                self.status_text.set("%s: %s" % (job.name, message))
+            elif JOB_DONE == kind:
+                self.status_text.set("%s: done" % job.name)
+            elif JOB_FAILED == kind:
+                self.status_text.set("%s: failed, %s" % (job.name, value))
+            elif JOB_CANCELLED == kind:
+                self.status_text.set("%s: cancelled" % job.name)
+
+        if not self.jobs.is_busy():
+            self.status_progress["value"] = 0
+        self.status_cancel["state"] = "normal" if self.jobs.is_busy() else "disabled"
+
     def init_polygon_view(self):
         """ reserved for non pygame canvas stuff (placeholder) """
         w = Canvas(self.root, width=DEFAULT_POLYGON_CANVAS_DIMENSIONS[0], height=DEFAULT_POLYGON_CANVAS_DIMENSIONS[1],background="#ffffff")
@@ -99,8 +325,13 @@ class FaceYankerApp:
         #scale coordinates to fit the screen, use the smaller of the x,y ratios
         #translate by margin while we're at it
         #note create_polygon does not play nice w/ numpy arrays
-        points = (np.array(margin+margin) + polygon2d.get_points_scaled(ratios)[:-1].astype(int)).tolist()
+        outer, holes = polygon2d.get_loops()
+        points = (np.array(margin+margin) + (np.array(outer)*ratios)[:-1].astype(int)).tolist()
         self.polygon_view.create_polygon(points, outline="#66ccff", fill="#66ccff")
+        #canvas polygons can't have holes, paint them over in the background color
+        for hole in holes:
+            points = (np.array(margin+margin) + (np.array(hole)*ratios)[:-1].astype(int)).tolist()
+            self.polygon_view.create_polygon(points, outline="#66ccff", fill="#ffffff")
         self.polygon_view.create_text(
             DEFAULT_POLYGON_CANVAS_DIMENSIONS[0]/2,
             DEFAULT_POLYGON_CANVAS_DIMENSIONS[1]-margin,
@@ -114,6 +345,7 @@ class FaceYankerApp:
         embed = Frame(self.root, width = DEFAULT_MODEL_CANVAS_DIMENSIONS[0], height = DEFAULT_MODEL_CANVAS_DIMENSIONS[1]) #creates embed frame for pygame window
         #embed.grid(columnspan = (600), rowspan = 500) # Adds grid
         embed.pack(side = LEFT) #packs window to the left
+        self.model_frame = embed
         os.environ['SDL_WINDOWID'] = str(embed.winfo_id())
         if platform.system == "Windows":
             os.environ['SDL_VIDEODRIVER'] = 'windib'
@@ -122,7 +354,7 @@ class FaceYankerApp:
         tree = ttk.Treeview(self.root,columns=("normal"), displaycolumns="normal", height=35)
         tree.column("normal", width=75)
         tree.heading("normal", text="Normal")
-        tree.tag_bind("face","<<TreeviewSelect>>", self.on_face_select)
+        self.explorer = ModelExplorer(tree, self.on_face_select)
         my_scroll = ttk.Scrollbar(orient="vertical")
         my_scroll.configure(command=tree.yview)
         tree.configure(yscrollcommand=my_scroll)
@@ -132,28 +364,12 @@ class FaceYankerApp:
         return tree
 
     def clear_model_explorer(self):
-        tree = self.model_explorer
-        tree.delete(*tree.get_children())
+        self.explorer.clear()
 
     def update_model_explorer(self):
         #clean an existing tree in case something is getting updated, such as
-        #face reduction
-        self.clear_model_explorer()
-        tree = self.model_explorer
-        for reference,model_placement in self.scene.model_placements.items():
-            #print(model_placement.reference)
-            model_root = tree.insert("", 1, model_placement.reference, text=model_placement.reference, open=True)
-            model = model_placement.model
-
-            for i,face in enumerate(model.faces):
-                tree.insert(
-                    model_root,
-                    "end",
-                    model_placement.reference + "-" + str(i),
-                    text=model_placement.hash_face_by_index(i),
-                    values=(face.get_unit_normal(),),
-                    tags=("face",)
-                )
+        #face reduction. only the first page of each model is inserted here
+        self.explorer.update(self.scene)
 
     def keydown(self,event):
         if DEBUG:
@@ -164,7 +380,9 @@ class FaceYankerApp:
                 print('This key is unprintable. The character is: %r keysym: %r %r' % \
                     (event.char, event.keysym, event.keysym_num))
 
-        if event.char == '-':
+        if event.keysym == 'Escape':
+            self.on_cancel_jobs()
+        elif event.char == '-':
             self.scene_viewer.zoom_in(1)
         elif event.char == '+':
             self.scene_viewer.zoom_out(1)
@@ -177,20 +395,28 @@ class FaceYankerApp:
         elif event.char == 'a':
             self.scene_viewer.move(1,0)
         elif event.char == '\r':
-            self.flatten_model()
-        self.scene_viewer.update()
+            self.on_flatten_model()
+        self.render_scheduler.request()
 
     def on_toggle_grid(self):
         self.scene_viewer.toggle_show_grid()
-        self.scene_viewer.update()
+        self.render_scheduler.request()
+
+    def on_toggle_cull_backfaces(self):
+        self.scene_viewer.toggle_cull_backfaces()
+        self.render_scheduler.request()
 
     def on_toggle_normals(self):
         self.scene_viewer.toggle_show_normals()
-        self.scene_viewer.update()
+        self.render_scheduler.request()
+
+    def on_set_render_mode(self, render_mode):
+        self.scene_viewer.set_render_mode(render_mode)
+        self.render_scheduler.request()
 
     def on_set_perspective(self, perspective):
         self.scene_viewer.set_perspective(perspective)
-        self.scene_viewer.update()
+        self.render_scheduler.request()
 
     def on_toggle_model_explorer(self):
         #this doesn't work quite right, when the widget is re-packed it
@@ -203,18 +429,50 @@ class FaceYankerApp:
         else:
             self.model_explorer.pack()
 
+    def on_model_frame_exposed(self, event):
+        self.scene_viewer.invalidate()
+        self.render_scheduler.request()
+
+    def on_cancel_jobs(self):
+        self.jobs.cancel_all()
+
     def on_flatten_model(self):
         """ called when flatten model is selected from menu
-            allows for other processing if needed
+            the reduction runs in the background, models are swapped in
+            once every one of them is done
         """
-        self.flatten_model()
-        self.scene_viewer.update()
+        originals = [(placement.reference, placement.model) for placement in self.scene.get_placement_snapshot()]
+        workers = self.reduction_workers
+
+        def reduce_models(progress):
+            reduced = []
+            for i,(reference,model) in enumerate(originals):
+                reduced.append((reference, model, self.model_cache.get_reduced_model(
+                    model,
+                    workers,
+                    lambda fraction, message: progress((i + fraction) / len(originals), message)
+                )))
+            return reduced
+
+        self.jobs.submit("reduce", reduce_models, on_done=self.on_models_reduced)
+
+    def on_models_reduced(self, reduced):
+        #placements changed while reducing (say, a new import) keep their model
+        for reference,model,reduced_model in reduced:
+            self.scene.swap_model(reference, model, reduced_model)
+        self.clear_polygon_view()
+        self.render_scheduler.request()
         self.update_model_explorer()
 
-    def flatten_model(self):
+    def flatten_model(self, workers=None):
+        """ reduce every model in the scene, workers is the number of
+            processes to spread the reduction over (see get_reduced_model)
+        """
+        if None is workers:
+            workers = self.reduction_workers
         for reference,model_placement in self.scene.model_placements.items():
             model = model_placement.model
-            reduced_model = model.get_reduced_model()
+            reduced_model = self.model_cache.get_reduced_model(model, workers)
             model_placement.model = reduced_model
 
     def on_export(self):
@@ -222,88 +480,80 @@ class FaceYankerApp:
             raise Exception("nothing to export")
 
         filename = filedialog.asksaveasfilename(filetypes=[("SVG files", "*.svg")])
-
-        if filename:
-            #gotta rework this so we know the dimensions in advance
-            #chicken egg problem
-            #size is apparently how we set the units, but we don't know size
-            #until we've gone through the 2d coordinates.
-            #will rework soon. For now, I'm hard-coding arbitrary dimensions.
-            dwg = svgwrite.Drawing(filename,size=("200mm","200mm"), viewBox=("0 0 200 200"))
-        else:
+        if not filename:
             return
 
-        groups = []
-
-        last_x, last_y = (0.0,0.0)
-        margin = 2
-        #todo replace w/ width (of viewBox)
-        per_row = 5
-        items_in_row = 0
-        max_y_in_row = 0.0
-
-        for reference,placement in self.scene.model_placements.items():
-            for index,face in enumerate(placement.model.faces):
-                items_in_row = items_in_row + 1
-                poly_2d = face.to2D()
-                poly_points = poly_2d.get_points()
-
-                #try converting to normal floats, dwg validator does not recognize numpy.float32
-                poly_points = [[float(coord) for coord in point] for point in poly_points[:-1]]
-                mid_x = sum([point[0] for point in poly_points])/len(poly_points)
-                mid_y = sum([point[1] for point in poly_points])/len(poly_points)
-                range_x = [min([point[0] for point in poly_points]),max([point[0] for point in poly_points])]
-                range_y = [min([point[1] for point in poly_points]),max([point[1] for point in poly_points])]
-                label = placement.reference + '-' + placement.hash_face_by_index(index)
-                group = svgwrite.container.Group(id=label,transform='translate(' + str(last_x + margin) + ',' + str(last_y + margin) + ')')
-                group.add(dwg.polygon(poly_points,stroke="rgb(0,0,255)",fill="none", stroke_width=".5pt"))
-
-                group.add(
-                    dwg.text(
-                        label,
-                        insert=(float(mid_x),float(mid_y)),
-                        font_size="6px",
-                        fill="rgb(200,0,0)"
-                    )
-                )
-
-                groups.append(group)
-
-                if per_row <= items_in_row:
-                    last_x = 0.0
-                    items_in_row = 0
-                    last_y = last_y + max_y_in_row
-                    max_y_in_row = 0.0
-
-                else:
-                    last_x = last_x + (range_x[1] - range_x[0])
-                    max_y_in_row = max(max_y_in_row,range_y[1] - range_y[0])
-
-        for group in groups:
-            dwg.add(group)
-
-        dwg.save()
-
-    def on_face_select(self, e):
-        item = self.model_explorer.focus()
-        model_placement = self.scene.get_model_placement(self.model_explorer.parent(item))
-        model_placement.set_active_face_index(int(self.model_explorer.item(item,"text"),0))
+        placements = self.scene.get_placement_snapshot()
+        self.jobs.submit("export", lambda progress: export_svg(filename, placements, progress))
+
+    def on_face_select(self, reference, face_index):
+        model_placement = self.scene.get_model_placement(reference)
+        model_placement.set_active_face_index(face_index)
         self.update_polygon_view(model_placement.get_active_face().to2D())
-        self.scene_viewer.update()
+        self.render_scheduler.request()
 
     def on_open(self):
         filename =  filedialog.askopenfilename(initialdir = "/",title = "Select file",filetypes = (("STL files", "*.stl"),("all files","*.*")))
-        my_mesh = mesh.Mesh.from_file(filename)
-        model = model_from_mesh(my_mesh)
+        if not filename:
+            return
+
+        self.jobs.submit(
+            "import " + os.path.basename(filename),
+            lambda progress: self.model_cache.load_model(filename, progress=progress),
+            on_done=self.on_model_loaded
+        )
 
+    def on_model_loaded(self, model):
         self.scene.add_model("my_model",model,(0,0,0),None)
-        self.scene_viewer.update()
+        self.clear_polygon_view()
+        self.render_scheduler.request()
+        self.update_model_explorer()
+
+    def on_save_project(self):
+        filename = filedialog.asksaveasfilename(defaultextension=".fyp", filetypes=[("FaceYanker projects", "*.fyp")])
+        if not filename:
+            return
+
+        #saving over the open project, windows won't replace a file that's
+        #still mapped. models read from it are copied into memory and the
+        #viewer redrawn so its caches let go of the old arrays too
+        swapped = False
+        for placement in self.scene.model_placements.values():
+            model = unmap_model(placement.model, filename)
+            if model is not placement.model:
+                placement.model = model
+                swapped = True
+        if swapped:
+            self.scene_viewer.update()
+            self.update_model_explorer()
+
+        placements = self.scene.get_placement_snapshot()
+        viewport_settings = get_viewport_settings(self.scene_viewer.viewport)
+        self.jobs.submit(
+            "save " + os.path.basename(filename),
+            lambda progress: save_project(filename, placements, viewport_settings, progress)
+        )
+
+    def on_open_project(self):
+        """ replaces the scene, loading only maps the file so it's done
+            right here rather than as a job
+        """
+        filename = filedialog.askopenfilename(filetypes=[("FaceYanker projects", "*.fyp"), ("all files", "*.*")])
+        if not filename:
+            return
+
+        scene, viewport_settings = load_project(filename)
+        self.scene.model_placements.clear()
+        self.scene.model_placements.update(scene.model_placements)
+        if None is not viewport_settings:
+            apply_viewport_settings(self.scene_viewer.viewport, viewport_settings)
+        self.clear_polygon_view()
+        self.render_scheduler.request()
         self.update_model_explorer()
 
     def test(self):
         print("testing")
-        my_mesh = mesh.Mesh.from_file("//ORCHID/home/development/faceyanker/py-faceyanker/source-files/testcube_35mm.stl")
-        model = model_from_mesh(my_mesh)
+        model = model_from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "source-files", "testcube_35mm.stl"))
         print(model.to_vector().tolist())
         self.scene.add_model("my_model",model,(0,0,0),None)
         self.scene_viewer.update()
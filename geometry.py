@@ -1,10 +1,241 @@
 import math
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 import numpy as np
 import copy
 
+#unit normals are rounded to this many decimals when grouping faces by plane
+NORMAL_DECIMALS = 6
+
+#number of processes used by get_reduced_model, 1 reduces in this process
+DEFAULT_REDUCTION_WORKERS = 1
+
+#faces built between progress reports in loops_from_edge_groups
+PROGRESS_INTERVAL = 1000
+
+#faces joined between progress reports in reduce_edge_soup
+UNION_PROGRESS_INTERVAL = 10000
+
+#seconds between progress reports while waiting on reduction workers
+WORKER_POLL_INTERVAL = .1
+
 def normalize_vector(v):
     return v/math.sqrt(sum([i*i for i in v]))
 
+class UnionFind:
+    """ Disjoint sets over the integers 0..n-1 """
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            #path halving
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a, b):
+        a = self.find(a)
+        b = self.find(b)
+        if a != b:
+            #keep the lowest index as the root so results are stable
+            if b < a:
+                a,b = b,a
+            self.parent[b] = a
+        return a
+
+def get_row_ids(rows):
+    """ integer id per row of a 2d array, equal rows get the same id
+        same as np.unique(rows, axis=0, return_inverse=True)[1] but using a
+        lexsort instead of sorting the rows as opaque records
+    """
+    rows = np.asarray(rows)
+    ids = np.zeros(len(rows), dtype=np.intp)
+    if 0 == len(rows):
+        return ids
+    order = np.lexsort(rows.T[::-1])
+    sorted_rows = rows[order]
+    is_new = np.any(sorted_rows[1:] != sorted_rows[:-1], axis=1)
+    ids[order] = np.concatenate(([0], np.cumsum(is_new)))
+    return ids
+
+def get_plane_keys(normals):
+    """ integer id per face, faces with the same (rounded) unit normal share an id """
+    normals = np.asarray(normals, dtype=float)
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1
+    #adding 0.0 turns -0.0 into 0.0 so they compare as the same direction
+    rounded = np.round(normals / lengths[:,None], NORMAL_DECIMALS) + 0.0
+    return get_row_ids(rounded)
+
+def reduce_edge_soup(edges, edge_faces, face_keys, progress=None):
+    """ Group faces that share an edge and lie on the same plane
+        edges: (e,2) vertex ids, directed the way they wind around their face
+        edge_faces: (e,) index of the face each edge belongs to
+        face_keys: (f,) plane id of each face, see get_plane_keys
+        progress: optional callback(fraction, message), called every
+        UNION_PROGRESS_INTERVAL joins, raising from it abandons the reduction
+
+        returns (groups, boundary). groups[f] is the lowest face index in the
+        group face f was merged into, boundary masks the edges that are not
+        cancelled by an edge running the other way in the same group
+    """
+    edges = np.asarray(edges)
+    edge_faces = np.asarray(edge_faces)
+    face_keys = np.asarray(face_keys)
+
+    #an edge is identified by its (unordered) vertex ids and its plane
+    low = np.minimum(edges[:,0], edges[:,1]).astype(np.int64)
+    high = np.maximum(edges[:,0], edges[:,1]).astype(np.int64)
+    pair_ids = np.unique(low * (high.max() + 1) + high, return_inverse=True)[1].reshape(-1)
+    plane_count = int(face_keys.max()) + 1
+    _, edge_ids, counts = np.unique(
+        pair_ids.astype(np.int64) * plane_count + face_keys[edge_faces],
+        return_inverse=True,
+        return_counts=True
+    )
+    edge_ids = edge_ids.reshape(-1)
+
+    #neighbouring entries with the same id are the faces on either side of an edge
+    order = np.argsort(edge_ids, kind="stable")
+    shared = edge_ids[order][1:] == edge_ids[order][:-1]
+    face_a = edge_faces[order][:-1][shared]
+    face_b = edge_faces[order][1:][shared]
+
+    sets = UnionFind(len(face_keys))
+    for i,(a,b) in enumerate(zip(face_a.tolist(), face_b.tolist())):
+        if None is not progress and 0 == i % UNION_PROGRESS_INTERVAL:
+            progress(i / len(face_a), "merging faces")
+        sets.union(a,b)
+
+    groups = np.array([sets.find(i) for i in range(len(face_keys))], dtype=np.intp)
+
+    #opposite directions cancel out, whatever is left over is boundary. with
+    #more than two faces on an edge that keeps every vertex with as many
+    #edges in as out, so the loops still chain
+    directions = np.where(edges[:,0] < edges[:,1], 1, -1)
+    net = np.bincount(edge_ids, weights=directions, minlength=len(counts)).astype(np.int64)
+    candidates = np.flatnonzero(directions == np.sign(net[edge_ids]))
+    candidates = candidates[np.argsort(edge_ids[candidates], kind="stable")]
+    candidate_ids = edge_ids[candidates]
+    rank = np.arange(len(candidates)) - np.searchsorted(candidate_ids, candidate_ids)
+    boundary = np.zeros(len(edges), dtype=bool)
+    boundary[candidates[rank < np.abs(net[candidate_ids])]] = True
+    return groups, boundary
+
+def _reduce_plane_chunk(edges, edge_faces, edge_keys):
+    """ process pool entry point, reduces a chunk made of whole planes
+        only integer topology is shipped, vertex coordinates stay behind
+        returns (boundary edges, group of each boundary edge) in global ids
+    """
+    faces, local_faces = np.unique(edge_faces, return_inverse=True)
+    local_faces = local_faces.reshape(-1)
+    face_keys = np.empty(len(faces), dtype=edge_keys.dtype)
+    face_keys[local_faces] = edge_keys
+
+    groups, boundary = reduce_edge_soup(edges, local_faces, face_keys)
+    return edges[boundary], faces[groups[local_faces[boundary]]]
+
+def reduce_edge_soup_parallel(edges, edge_faces, face_keys, workers, progress=None):
+    """ Same as reduce_edge_soup but planes are split into chunks and reduced
+        across a process pool. planes never share edges so the chunks are
+        independent. returns (boundary edges, group of each boundary edge)
+        progress: optional callback(fraction, message), called while waiting
+        on the workers. raising from it drops the chunks not started yet
+        and returns without waiting for the running ones
+    """
+    edges = np.asarray(edges)
+    edge_faces = np.asarray(edge_faces)
+    edge_keys = np.asarray(face_keys)[edge_faces]
+
+    #compact dtypes keep pickling cheap
+    index_type = np.int32 if max(len(face_keys), int(edges.max()) + 1) < 2**31 else np.int64
+    order = np.argsort(edge_keys, kind="stable")
+    edges = edges[order].astype(index_type)
+    edge_faces = edge_faces[order].astype(index_type)
+    edge_keys = edge_keys[order].astype(index_type)
+
+    #cut into roughly equal chunks, only where one plane ends and the next starts
+    plane_starts = np.flatnonzero(np.diff(edge_keys)) + 1
+    targets = (np.arange(1, workers) * len(edge_keys)) // workers
+    cuts = np.unique(plane_starts[np.minimum(
+        np.searchsorted(plane_starts, targets), len(plane_starts) - 1
+    )]) if len(plane_starts) else np.array([], dtype=np.intp)
+    bounds = [0] + cuts.tolist() + [len(edge_keys)]
+    chunks = [
+        (edges[start:end], edge_faces[start:end], edge_keys[start:end])
+        for start,end in zip(bounds[:-1], bounds[1:]) if end > start
+    ]
+
+    if len(chunks) < 2:
+        results = [_reduce_plane_chunk(*chunk) for chunk in chunks]
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(chunks)))
+        try:
+            futures = [executor.submit(_reduce_plane_chunk, *chunk) for chunk in chunks]
+            pending = set(futures)
+            while pending:
+                if None is not progress:
+                    progress(1 - len(pending) / len(futures), "merging faces")
+                done, pending = wait(pending, WORKER_POLL_INTERVAL, FIRST_COMPLETED)
+            results = [future.result() for future in futures]
+        except:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+    return (
+        np.concatenate([result[0] for result in results]),
+        np.concatenate([result[1] for result in results])
+    )
+
+def model_from_loop_arrays(coords, face_offsets, loop_offsets, normals):
+    """ Build a Model back from the arrays of Model.to_loop_arrays, faces
+        are only turned into objects when they're accessed
+    """
+    return Model(loops=PolygonMesh(coords, face_offsets, loop_offsets, normals))
+
+def loops_from_edge_groups(vertices, edges, edge_groups, normals, progress=None):
+    """ Build a PolygonMesh with one face per group from directed boundary
+        edges, loops are chained on vertex ids so no Face, Edge or Point
+        objects are built
+        edge_groups: (e,) group id of each edge
+        normals: normal to use for each group, indexed by group id
+        progress: optional callback(fraction, message), called every
+        PROGRESS_INTERVAL faces
+    """
+    order = np.argsort(edge_groups, kind="stable")
+    edges = np.asarray(edges)[order]
+    edge_groups = np.asarray(edge_groups)[order]
+    starts = np.flatnonzero(np.diff(edge_groups, prepend=-1))
+    ends = np.append(starts[1:], len(edge_groups))
+    vertices = np.asarray(vertices, dtype=float).reshape(-1,3)
+
+    edge_list = edges.tolist()
+    point_ids = []
+    loop_lengths = []
+    loop_counts = []
+    for i,(start,end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        if None is not progress and 0 == i % PROGRESS_INTERVAL:
+            progress(i / len(starts), "building faces")
+        outer, holes = split_outer_loop(chain_edge_loops(edge_list[start:end]), vertices)
+        loops = [outer] + holes
+        for loop in loops:
+            #loops come back closed, the repeated first point isn't stored
+            point_ids.extend(loop[:-1])
+            loop_lengths.append(len(loop) - 1)
+        loop_counts.append(len(loops))
+
+    loop_offsets = np.concatenate(([0], np.cumsum(loop_lengths, dtype=np.intp)))
+    face_offsets = loop_offsets[np.concatenate(([0], np.cumsum(loop_counts, dtype=np.intp)))]
+    return PolygonMesh(
+        vertices[np.array(point_ids, dtype=np.intp)],
+        face_offsets,
+        loop_offsets,
+        np.asarray(normals, dtype=float).reshape(-1,3)[edge_groups[starts]]
+    )
+
 def merge_faces(face_a, face_b):
     if not np.array_equal(face_a.get_unit_normal(), face_b.get_unit_normal()):
         raise Exception("cannot merge faces, not on same plane")
@@ -21,55 +252,229 @@ def merge_faces(face_a, face_b):
 
     return new_face
 
+def _edge_ends(edge):
+    """ start and end coordinates of an Edge or a pair of coordinates """
+    if isinstance(edge, Edge):
+        a,b = edge.points
+        return (a.x,a.y,a.z), (b.x,b.y,b.z)
+    return tuple(edge[0]), tuple(edge[1])
+
+def get_loop_area(loop):
+    """ area enclosed by a closed loop of 2d or 3d points """
+    points = np.asarray(loop, dtype=float)
+    if len(points) < 3:
+        return 0.0
+    if 2 == points.shape[1]:
+        return abs(np.sum(
+            points[:-1,0] * points[1:,1] - points[1:,0] * points[:-1,1]
+        )) / 2
+    return np.linalg.norm(np.sum(np.cross(points[:-1], points[1:]), axis=0)) / 2
+
+def get_loops_from_edges(edges):
+    """ chain directed edges into closed loops, edges can be in any order
+        every loop repeats its first point at the end
+    """
+    return chain_edge_loops([_edge_ends(edge) for edge in edges])
+
+def chain_edge_loops(ends):
+    """ get_loops_from_edges on (start, end) pairs of anything hashable,
+        coordinate tuples or vertex ids
+    """
+    #lookup of edges by the point they start at
+    starting_at = {}
+    for i,(start,end) in enumerate(ends):
+        starting_at.setdefault(start, []).append(i)
+
+    used = [False] * len(ends)
+    loops = []
+    for first in range(len(ends)):
+        if used[first]:
+            continue
+        used[first] = True
+        loop = [ends[first][0], ends[first][1]]
+        while loop[-1] != loop[0]:
+            candidates = starting_at.get(loop[-1], [])
+            while candidates and used[candidates[-1]]:
+                candidates.pop()
+            if not candidates:
+                raise Exception("could not chain all edges")
+            current = candidates.pop()
+            used[current] = True
+            loop.append(ends[current][1])
+        loops.append(loop)
+
+    return loops
+
+def get_unique_edges(edges):
+    """ return (unique, edge_ids), every undirected edge listed once with the
+        lower vertex id first, edge_ids maps each input edge to its row in unique
+    """
+    edges = np.sort(np.asarray(edges).reshape(-1,2), axis=1)
+    row_ids = get_row_ids(edges)
+    if 0 == len(edges):
+        return edges, row_ids
+    first = np.unique(row_ids, return_index=True)[1]
+    return edges[first], row_ids
+
+def get_edge_strips(edges):
+    """ chain undirected (e,2) vertex id edges into as few open or closed
+        polylines as a greedy walk finds, each edge is used exactly once
+        returns a list of vertex id lists
+    """
+    edge_list = np.asarray(edges).tolist()
+    touching = {}
+    for i,(a,b) in enumerate(edge_list):
+        touching.setdefault(a, []).append(i)
+        touching.setdefault(b, []).append(i)
+
+    #starting at odd vertices first means most strips run end to end
+    starts = [vertex for vertex,found in touching.items() if len(found) % 2]
+    starts = starts + list(touching.keys())
+
+    used = [False] * len(edge_list)
+    strips = []
+    for start in starts:
+        while True:
+            strip = [start]
+            current = start
+            while True:
+                candidates = touching[current]
+                while candidates and used[candidates[-1]]:
+                    candidates.pop()
+                if not candidates:
+                    break
+                edge = candidates.pop()
+                used[edge] = True
+                a,b = edge_list[edge]
+                current = b if a == current else a
+                strip.append(current)
+            if len(strip) < 2:
+                break
+            strips.append(strip)
+
+    return strips
+
+def split_outer_loop(loops, vertices=None):
+    """ return (outer, holes), the outer boundary is the loop with the
+        largest area, everything else is a hole inside it
+        vertices: when given, loops are lists of ids into it
+    """
+    if not loops:
+        return [], []
+    if 1 == len(loops):
+        return loops[0], []
+    areas = [get_loop_area(loop if None is vertices else vertices[loop]) for loop in loops]
+    outer = int(np.argmax(areas))
+    return loops[outer], loops[:outer] + loops[outer+1:]
+
 def get_ordered_points_from_edges(edges):
     """ chain edges together into a list of points, should
-    be able to handle edges that are out of order """
-    ret = []
-    if len(edges) < 1:
-        return ret
-
-    #track list of edge indexes we processed
-    done = []
-    last_point = None
-    while len(done) < len(edges):
-        old_len = len(done)
-        for i in range(len(edges)):
-            if last_point is None:
-                ret.append(edges[i][0])
-                ret.append(edges[i][1])
-                done.append(i)
-            else:
-                #if edges[i][0] == last_point:
-                #(a, b, rtol=1e-05, atol=1e-08, equal_nan=False)[source]¶
-                if np.allclose(edges[i][0], last_point, rtol=1e-9, atol=0.0):
-                    ret.append(edges[i][1])
-                    done.append(i)
-            if len(done):
-                last_point = edges[done[-1]][1]
-        #if there are edges left, but we found nothing new
-        if len(done) != len(edges) and len(done) == old_len:
-            raise Exception("could not chain all edges")
-    return ret
+    be able to handle edges that are out of order.
+    only the outer boundary is returned, see get_loops_from_edges for holes """
+    return split_outer_loop(get_loops_from_edges(edges))[0]
+
+def flatten_loops(coords, face_offsets, normals):
+    """ Project every face onto its own plane in a handful of array operations
+        coords: (n,3) loop points of all faces one after the other
+        face_offsets: (f+1,) where each face starts in coords
+        normals: (f,3) face normals
+
+        each face gets a local basis with its first point as the origin and
+        the x axis along its first edge, same as Face.to2D
+        returns (n,2) coordinates laid out like coords
+    """
+    coords = np.asarray(coords, dtype=float)
+    face_offsets = np.asarray(face_offsets)
+    if 0 == len(coords):
+        return np.zeros((0,2))
+
+    starts = face_offsets[:-1]
+    face_ids = np.repeat(np.arange(len(starts)), np.diff(face_offsets))
+
+    origins = coords[starts]
+    x_axes = coords[starts + 1] - origins
+    x_axes /= np.linalg.norm(x_axes, axis=1)[:,None]
+    y_axes = np.cross(np.asarray(normals, dtype=float), x_axes)
+    y_axes /= np.linalg.norm(y_axes, axis=1)[:,None]
+
+    #(n,3) offsets from origin times a (n,3,2) stack of the two axes
+    bases = np.stack([x_axes, y_axes], axis=2)
+    return np.einsum("ij,ijk->ik", coords - origins[face_ids], bases[face_ids])
+
+def get_first_loops(face_offsets, loop_offsets):
+    """ (f+1,) index of the first loop of every face in loop_offsets, the
+        last entry is the number of loops. face i has loops
+        first_loops[i]..first_loops[i+1]
+    """
+    return np.searchsorted(np.asarray(loop_offsets), np.asarray(face_offsets))
+
+class DerivedGeometry:
+    """ Memo of values worked out from a shape's edges (loops, normals,
+        extents...), each computed on first use and kept until clear()
+        hits and misses are counted across every shape, see get_stats
+        cached values are shared, callers must not modify them
+    """
+    hits = 0
+    misses = 0
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, name, compute):
+        if name in self.values:
+            DerivedGeometry.hits = DerivedGeometry.hits + 1
+            return self.values[name]
+
+        DerivedGeometry.misses = DerivedGeometry.misses + 1
+        value = compute()
+        self.values[name] = value
+        return value
+
+    def clear(self):
+        self.values.clear()
+
+    @staticmethod
+    def get_stats():
+        return {
+            "hits": DerivedGeometry.hits,
+            "misses": DerivedGeometry.misses
+        }
+
+    @staticmethod
+    def reset_stats():
+        DerivedGeometry.hits = 0
+        DerivedGeometry.misses = 0
 
 class Polygon2d:
     def __init__(self):
         self.edges = []
+        self.derived = DerivedGeometry()
 
     def add_edge(self, edge):
         #this should keep edges sorted
         self.edges.append(edge)
+        self.derived.clear()
+
+    def mark_changed(self):
+        """ call after modifying edges directly """
+        self.derived.clear()
 
     def get_points(self):
-        return get_ordered_points_from_edges(self.edges)
+        return self.get_loops()[0]
+
+    def get_loops(self):
+        """ return (outer, holes) as closed lists of points """
+        return self.derived.get("loops", lambda: split_outer_loop(get_loops_from_edges(self.edges)))
 
     def get_points_scaled(self,scale_factors):
         return self.get_points()*scale_factors
 
 
     def get_extents(self):
-        coords = self.get_points()
-        extents = [np.amin(coords, axis=0),np.amax(coords, axis=0)]
-        return extents
+        def compute():
+            coords = self.get_points()
+            return [np.amin(coords, axis=0),np.amax(coords, axis=0)]
+        return self.derived.get("extents", compute)
 
     def get_dimensions(self):
         vals = self.get_extents()
@@ -86,6 +491,11 @@ class Polygon2d:
 
 
 class Point:
+    """ A 3d point, slotted and compared coordinate by coordinate since
+        millions of these get built and compared when reducing a model
+    """
+    __slots__ = ("x", "y", "z")
+
     def __init__(self,x=0,y=0,z=0):
         self.x,self.y,self.z = x,y,z
 
@@ -93,7 +503,7 @@ class Point:
         return np.array([self.x,self.y,self.z])
 
     def __eq__(self, other):
-        return np.array_equal(self.to_vector(),other.to_vector())
+        return bool(self.x == other.x and self.y == other.y and self.z == other.z)
 
     def __str__(self):
         return str([self.x,self.y,self.z])
@@ -102,17 +512,22 @@ class Point:
         return self.__str__()
 
     def __sub__(self,other):
-        new_point = self.to_vector() - other.to_vector()
-        return Point(new_point[0],new_point[1],new_point[2])
+        return Point(self.x - other.x, self.y - other.y, self.z - other.z)
 
     def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            return (self.x,self.y,self.z)[i]
+        #slices and index arrays keep returning numpy arrays
         return self.to_vector()[i]
 
     def __iter__(self):
-        for i in self.to_vector():
-            yield i
+        yield self.x
+        yield self.y
+        yield self.z
 
 class Edge:
+    __slots__ = ("points",)
+
     def __init__(self, points):
         if len(points) != 2:
             raise Exception("invalid edge")
@@ -120,13 +535,9 @@ class Edge:
         self.points = points
 
     def __eq__(self, other):
-        return (
-            self.points[0] == other.points[0]
-            and self.points[1] == other.points[1]
-        ) or (
-            self.points[0] == other.points[1]
-            and self.points[1] == other.points[0]
-        )
+        a,b = self.points
+        c,d = other.points
+        return (a == c and b == d) or (a == d and b == c)
 
     def to_vector(self):
         return np.array([[point.x,point.y,point.z] for point in self.points])
@@ -138,54 +549,81 @@ class Edge:
         return self.__str__()
 
     def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            return self.points[i].to_vector()
         return self.to_vector()[i]
 
     def __iter__(self):
-        for i in self.to_vector():
-            yield i
+        for point in self.points:
+            yield point.to_vector()
 
 class Face:
     def __init__(self, edges = [], normal = None):
+        #derived values are cached, replacing edges or normal drops them
+        self.derived = DerivedGeometry()
         self.edges = edges
         self.normal = normal
-        self.unit_normal = None
 
         if None is normal:
             self.normal = self.get_normal()
 
-        self.unit_normal = self.get_unit_normal()
+    @property
+    def edges(self):
+        return self._edges
+
+    @edges.setter
+    def edges(self, edges):
+        self._edges = edges
+        self.derived.clear()
+
+    @property
+    def normal(self):
+        return self._normal
+
+    @normal.setter
+    def normal(self, normal):
+        self._normal = normal
+        self.derived.clear()
+
+    @property
+    def unit_normal(self):
+        return self.get_unit_normal()
+
+    def mark_changed(self):
+        """ call after modifying edges (or their points) in place """
+        self.derived.clear()
 
     def to2D(self):
-        local_origin = (self.edges[0].points[0]).to_vector()
-        local_x_axis = normalize_vector(self.edges[0].points[1].to_vector() - local_origin)
+        """ the face in its own plane, first point at the origin and the x
+            axis along the first edge. the polygon is cached with the face
+        """
+        return self.derived.get("2d", self.get_2d)
+
+    def get_2d(self):
+        edges = np.array([edge.to_vector() for edge in self.edges], dtype=float)
+        local_origin = edges[0][0]
+        local_x_axis = normalize_vector(edges[0][1] - local_origin)
         local_y_axis = normalize_vector(np.cross(self.normal, local_x_axis))
+
+        #local X and Y coordinate of every edge end in one go
+        new_edges = np.dot(edges - local_origin, np.stack([local_x_axis, local_y_axis], axis=1))
+
         poly = Polygon2d()
-        new_edges = []
-        for edge in self.edges:
-            new_edge = []
-            for point in edge.points:
-                p = point.to_vector()
-                new_point = [
-                    np.dot(p - local_origin, local_x_axis),  # local X coordinate
-                    np.dot(p - local_origin, local_y_axis)
-                ]
-                new_edge.append(new_point)
+        for new_edge in new_edges.tolist():
             poly.add_edge(new_edge)
 
         return poly
 
-
-
     def get_midpoint(self):
-        return Point(
+        return self.derived.get("midpoint", lambda: Point(
                     sum([edge.points[0].x for edge in self.edges])/len(self.edges),
                     sum([edge.points[0].y for edge in self.edges])/len(self.edges),
                     sum([edge.points[0].z for edge in self.edges])/len(self.edges)
-        )
+        ))
 
     def get_unit_normal(self):
         if None is not self.normal:
-            return normalize_vector(self.normal)
+            return self.derived.get("unit_normal", lambda: normalize_vector(self.normal))
         else:
             return None
 
@@ -208,8 +646,20 @@ class Face:
         """ return true if any edge matches """
         return any([other.contains_edge(edge) for edge in self.edges])
 
+    def get_loops(self):
+        """ (outer, holes) as closed lists of points, see split_outer_loop """
+        return self.derived.get("loops", lambda: split_outer_loop(get_loops_from_edges(self.edges)))
+
     def to_vector(self):
-        return np.array([point for point in get_ordered_points_from_edges(self.edges)][:-1])
+        """ points around the outer boundary """
+        return self.derived.get("vector", lambda: np.array(self.get_loops()[0][:-1]))
+
+    def to_vectors(self):
+        """ points around every loop, the outer boundary first then any holes """
+        def compute():
+            outer, holes = self.get_loops()
+            return [np.array(loop[:-1]) for loop in [outer] + holes]
+        return self.derived.get("vectors", compute)
 
     def __str__(self):
         return str([edge.to_vector() for edge in self.edges]) + ":" + str(self.unit_normal)
@@ -243,72 +693,288 @@ class Triangle(Face):
         pass
 
     def get_midpoint(self):
-        return Point(
+        return self.derived.get("midpoint", lambda: Point(
             (self.edges[0].points[0].x + self.edges[1].points[0].x + self.edges[2].points[0].x)/3,
             (self.edges[0].points[0].y + self.edges[1].points[0].y + self.edges[2].points[0].y)/3,
             (self.edges[0].points[0].z + self.edges[1].points[0].z + self.edges[2].points[0].z)/3
+        ))
+
+class IndexedMesh:
+    """ Shared vertex triangle mesh stored as flat arrays
+        vertices: (n,3) unique vertex coordinates
+        faces: (m,3) indexes into vertices, one row per triangle
+        normals: (m,3) one normal per triangle
+    """
+    def __init__(self, vertices, faces, normals):
+        self.vertices = np.asarray(vertices)
+        self.faces = np.asarray(faces)
+        self.normals = np.asarray(normals)
+
+    def __len__(self):
+        return len(self.faces)
+
+    def get_face_vectors(self):
+        """ (m,3,3) corner coordinates of every triangle """
+        return self.vertices[self.faces]
+
+    def get_triangle(self, i):
+        """ build a Triangle object for a single face, points are shared
+            between the edges that meet at them
+        """
+        a,b,c = [Point(*vertex) for vertex in self.vertices[self.faces[i]].tolist()]
+        return Triangle(
+            Edge([a,b]),
+            Edge([b,c]),
+            Edge([c,a]),
+            self.normals[i]
         )
 
+    def get_face(self, i):
+        return self.get_triangle(i)
+
+class PolygonMesh:
+    """ Polygons (with holes) stored as flat arrays, see Model.to_loop_arrays
+        coords: (n,3) points of every loop, outer boundary first, face after face
+        face_offsets: (f+1,) where each face starts in coords
+        loop_offsets: (l+1,) where each loop starts in coords
+        normals: (f,3) one normal per face
+    """
+    def __init__(self, coords, face_offsets, loop_offsets, normals):
+        self.coords = np.asarray(coords)
+        self.face_offsets = np.asarray(face_offsets)
+        self.loop_offsets = np.asarray(loop_offsets)
+        self.normals = np.asarray(normals)
+
+    def __len__(self):
+        return len(self.face_offsets) - 1
+
+    def get_face(self, i):
+        """ build a Face object for a single face, each loop becomes a
+            closed ring of edges
+        """
+        face_edges = []
+        #looked up per face so only the pages around it are read when the
+        #arrays are memory mapped
+        first, last = get_first_loops(self.face_offsets[i:i + 2], self.loop_offsets).tolist()
+        for loop in range(first, last):
+            points = [Point(*coord) for coord in self.coords[self.loop_offsets[loop]:self.loop_offsets[loop + 1]].tolist()]
+            face_edges.extend(Edge([a, b]) for a,b in zip(points, points[1:] + points[:1]))
+        return Face(face_edges, self.normals[i])
+
+    def to_edge_arrays(self):
+        """ (vertices, edges, edge_faces), every point is joined to the next
+            one in its loop, equal points share a vertex id
+        """
+        vertex_ids = get_row_ids(self.coords)
+        vertices = np.zeros((vertex_ids.max() + 1 if len(vertex_ids) else 0, 3))
+        vertices[vertex_ids] = self.coords
+
+        following = np.arange(1, len(self.coords) + 1)
+        following[self.loop_offsets[1:] - 1] = self.loop_offsets[:-1]
+        edges = np.stack((vertex_ids, vertex_ids[following[:len(vertex_ids)]]), axis=1) if len(vertex_ids) else np.zeros((0,2), dtype=np.intp)
+        edge_faces = np.repeat(np.arange(len(self)), np.diff(self.face_offsets))
+        return vertices, edges, edge_faces
+
+class MeshFaceList:
+    """ Read only list of faces backed by an IndexedMesh or PolygonMesh
+        Face objects are only built when a face is accessed
+    """
+    def __init__(self, mesh):
+        self.mesh = mesh
+
+    def __len__(self):
+        return len(self.mesh)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.mesh.get_face(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i = i + len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("face index out of range")
+        return self.mesh.get_face(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.mesh.get_face(i)
+
 class Model:
     """A collection of faces"""
-    def __init__(self):
-        self.faces = []
+    def __init__(self, mesh=None, loops=None):
+        #when built from an IndexedMesh (triangles) or a PolygonMesh (loops),
+        #faces are read from the arrays rather than stored as objects
+        self.mesh = mesh
+        self.loops = loops
+        if None is not mesh:
+            self.faces = MeshFaceList(mesh)
+        elif None is not loops:
+            self.faces = MeshFaceList(loops)
+        else:
+            self.faces = []
+        #bumped on every change so viewers know when cached data is stale
+        self.version = 0
         origin = Point(0,0,0)
 
+    def mark_changed(self):
+        """ call after modifying faces directly """
+        self.version = self.version + 1
+
     def to_vector(self):
-        return np.array([face.to_vector() for face in self.faces])
+        """ points around the outer boundary of every face, (m,3,3) for
+            triangle meshes. polygons can have any number of points, so
+            otherwise it's a list of (k,3) arrays, views into the loop
+            arrays when the model has them
+        """
+        if None is not self.mesh:
+            return self.mesh.get_face_vectors()
+        if None is not self.loops:
+            coords, face_offsets, loop_offsets = self.loops.coords, self.loops.face_offsets, self.loops.loop_offsets
+            first_loops = get_first_loops(face_offsets, loop_offsets)[:-1]
+            return [coords[start:end] for start,end in zip(
+                loop_offsets[first_loops].tolist(), loop_offsets[first_loops + 1].tolist()
+            )]
+        return [face.to_vector() for face in self.faces]
+
+    def get_unique_edges(self):
+        """ return (vertices, edges) with every edge shared between faces
+            listed once, edges are (e,2) vertex ids with the lower id first
+        """
+        vertices, edges, edge_faces, normals = self.to_edge_arrays()
+        return vertices, get_unique_edges(edges)[0]
+
+    def get_unit_normals(self):
+        """ (f,3) unit normal of every face """
+        if None is not self.mesh:
+            normals = np.asarray(self.mesh.normals, dtype=float)
+        elif None is not self.loops:
+            normals = np.asarray(self.loops.normals, dtype=float).reshape(-1,3)
+        else:
+            normals = np.array([face.normal for face in self.faces], dtype=float).reshape(-1,3)
+        lengths = np.linalg.norm(normals, axis=1)
+        lengths[lengths == 0] = 1
+        return normals / lengths[:,None]
+
+    def get_face_midpoints(self):
+        """ (f,3) average of the points of every face, same as Face.get_midpoint """
+        vertices, edges, edge_faces, normals = self.to_edge_arrays()
+        counts = np.bincount(edge_faces, minlength=len(normals)).astype(float)
+        counts[counts == 0] = 1
+        starts = np.asarray(vertices, dtype=float)[edges[:,0]]
+        return np.stack([
+            np.bincount(edge_faces, weights=starts[:,axis], minlength=len(normals))
+            for axis in range(3)
+        ], axis=1) / counts[:,None]
+
+    def to_loop_arrays(self):
+        """ return (coords, face_offsets, loop_offsets, normals)
+            coords holds the points of every loop (outer boundary first, then
+            holes) face after face, the offset arrays mark where each face
+            and each loop starts, with a final entry for the end
+        """
+        if None is not self.mesh:
+            coords = self.mesh.get_face_vectors().reshape(-1,3)
+            offsets = np.arange(0, len(coords) + 1, 3)
+            return coords, offsets, offsets, self.mesh.normals
+        if None is not self.loops:
+            return self.loops.coords, self.loops.face_offsets, self.loops.loop_offsets, self.loops.normals
+
+        loops = []
+        face_offsets = [0]
+        loop_offsets = [0]
+        for face in self.faces:
+            for loop in face.to_vectors():
+                loops.append(loop)
+                loop_offsets.append(loop_offsets[-1] + len(loop))
+            face_offsets.append(loop_offsets[-1])
+
+        coords = np.concatenate(loops).reshape(-1,3) if loops else np.zeros((0,3))
+        normals = np.array([face.normal for face in self.faces], dtype=float).reshape(-1,3)
+        return coords, np.array(face_offsets), np.array(loop_offsets), normals
+
+    def flatten(self):
+        """ Project every face to 2d in one vectorized pass
+            returns (coords, face_offsets, loop_offsets), coords is (n,2) and
+            the offsets index into it, see to_loop_arrays and get_first_loops
+        """
+        coords, face_offsets, loop_offsets, normals = self.to_loop_arrays()
+        return flatten_loops(coords, face_offsets, normals), face_offsets, loop_offsets
 
     def add_face(self, face):
+        if None is not self.mesh or None is not self.loops:
+            #adding to an array backed model, switch to a plain list of faces
+            self.faces = list(self.faces)
+            self.mesh = None
+            self.loops = None
         self.faces.append(face)
+        self.mark_changed()
         #print("============== face ==============")
         #print(face.points)
         #print(face.normal)
 
-    def get_reduced_model(self):
-        """ Merge adjacent / coplanar surfaces into new polygons"""
-
-        face_dict = {}
-        #create a lookup dictionary of faces by normal for faster processing
+    def to_edge_arrays(self):
+        """ return (vertices, edges, edge_faces, normals) describing every face
+            as directed edges between integer vertex ids
+        """
+        if None is not self.mesh:
+            faces = self.mesh.faces
+            edges = faces[:,[0,1,1,2,2,0]].reshape(-1,2)
+            edge_faces = np.repeat(np.arange(len(faces)), 3)
+            return self.mesh.vertices, edges, edge_faces, self.mesh.normals
+        if None is not self.loops:
+            return self.loops.to_edge_arrays() + (self.loops.normals,)
+
+        vertex_ids = {}
+        edges = []
+        edge_faces = []
+        for i,face in enumerate(self.faces):
+            for edge in face.edges:
+                edges.append([
+                    vertex_ids.setdefault(
+                        (point.x,point.y,point.z), len(vertex_ids)
+                    ) for point in edge.points
+                ])
+                edge_faces.append(i)
+
+        vertices = np.array(list(vertex_ids.keys()), dtype=float).reshape(-1,3)
+        normals = np.array([face.normal for face in self.faces], dtype=float).reshape(-1,3)
+        return (
+            vertices,
+            np.array(edges, dtype=np.intp).reshape(-1,2),
+            np.array(edge_faces, dtype=np.intp),
+            normals
+        )
 
-        for face in self.faces:
-            face_list = face_dict.setdefault(tuple(face.get_unit_normal()),[])
-            face_list.append({"face":face,"assimilated":False})
-
-        for normal,processed_faces in face_dict.items():
-            #print("Side")
-            #print(normal)
-            #print("=======================================================")
-            done = False
-            while not done:
-                #every time we find something, we need another run through
-                found_something = False
-                for i in range(len(processed_faces)):
-                    #print("-----------------------")
-                    #print("comparing face against %i faces" % len(processed_faces))
-                    if not processed_faces[i]["assimilated"]:
-                        for j in range(len(processed_faces)):
-                            if processed_faces[j]["face"] == processed_faces[i]["face"]:
-                                #skip self
-                                pass
-                            elif processed_faces[j]["assimilated"]:
-                                #skip other faces that have already been assimilated
-                                pass
-                            elif processed_faces[j]["face"].adjacent_to(processed_faces[i]["face"]):
-                                #this face is adjacent and should be merged / assimilated
-                                processed_faces[i]["face"] = merge_faces(processed_faces[i]["face"],processed_faces[j]["face"])
-                                processed_faces[j]["assimilated"] = True
-                                found_something = True
-                            else:
-                                #not adjacent, nothing to do
-                                pass
-                if not found_something:
-                    done = True
-
-        new_model = Model()
-
-        for normal,processed_faces in face_dict.items():
-            for processed_face in processed_faces:
-                if not processed_face["assimilated"]:
-                    new_model.add_face(processed_face["face"])
-
-        return new_model
+    def get_reduced_model(self, workers=DEFAULT_REDUCTION_WORKERS, progress=None):
+        """ Merge adjacent / coplanar surfaces into new polygons
+            workers > 1 reduces groups of planes in a process pool,
+            None uses one worker per cpu
+            progress: optional callback(fraction, message), raising from it
+            abandons the reduction
+        """
+        if None is not progress:
+            progress(0, "merging faces")
+        vertices, edges, edge_faces, normals = self.to_edge_arrays()
+        #merging is the first half of the work, building loops the second
+        merge_progress = None if None is progress else lambda fraction, message: progress(fraction / 2, message)
+        if 0 == len(edges):
+            return Model()
+
+        face_keys = get_plane_keys(normals)
+        if None is workers:
+            workers = os.cpu_count() or 1
+
+        if workers > 1:
+            boundary_edges, edge_groups = reduce_edge_soup_parallel(
+                edges, edge_faces, face_keys, workers, merge_progress
+            )
+        else:
+            groups, boundary = reduce_edge_soup(edges, edge_faces, face_keys, merge_progress)
+            boundary_edges = edges[boundary]
+            edge_groups = groups[edge_faces[boundary]]
+
+        #merged faces keep the normal of the first face in their group, they
+        #stay as flat loop arrays and are only turned into objects on access
+        return Model(loops=loops_from_edge_groups(
+            vertices, boundary_edges, edge_groups, normals,
+            None if None is progress else lambda fraction, message: progress(.5 + fraction / 2, message)
+        ))
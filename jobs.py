@@ -0,0 +1,114 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+#jobs run one after another by default so a reduction and an export queued
+#behind it see the same models the user did
+DEFAULT_JOB_WORKERS = 1
+
+#kinds of message a job posts back, see JobExecutor.poll
+JOB_PROGRESS = "progress"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+class JobCancelled(Exception):
+    """ raised from a job's progress callback once the job is cancelled """
+    pass
+
+class Job:
+    """ One unit of background work
+        the work function is handed job.report as its progress callback,
+        which doubles as the point where a cancelled job stops
+    """
+    def __init__(self, name, messages, on_done=None, on_failed=None):
+        self.name = name
+        self.messages = messages
+        self.on_done = on_done
+        self.on_failed = on_failed
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    def cancel(self):
+        self.cancel_event.set()
+        #a job that never started won't post anything itself
+        if None is not self.future and self.future.cancel():
+            self.messages.put((self, JOB_CANCELLED, None))
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def report(self, fraction, message=""):
+        if self.cancel_event.is_set():
+            raise JobCancelled(self.name)
+        self.messages.put((self, JOB_PROGRESS, (fraction, message)))
+
+class JobExecutor:
+    """ Run jobs on a thread pool and pass their progress and results back
+        through a thread-safe queue
+        nothing here touches the ui, the owner calls poll() from its own
+        thread (the Tk main loop) and callbacks run there, so results can be
+        swapped into the scene without locking. heavy numpy stages release
+        the gil, get_reduced_model can still fan out to processes itself
+    """
+    def __init__(self, workers=DEFAULT_JOB_WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.messages = queue.Queue()
+        self.jobs = []
+
+    def submit(self, name, work, on_done=None, on_failed=None):
+        """ queue work(progress) to run in the background
+            on_done(result) or on_failed(exception) are called from poll()
+            returns the Job
+        """
+        job = Job(name, self.messages, on_done, on_failed)
+        self.jobs.append(job)
+        job.future = self.pool.submit(self.run, job, work)
+        return job
+
+    def run(self, job, work):
+        try:
+            job.report(0, "started")
+            result = work(job.report)
+        except JobCancelled:
+            self.messages.put((job, JOB_CANCELLED, None))
+        except Exception as e:
+            self.messages.put((job, JOB_FAILED, e))
+        else:
+            self.messages.put((job, JOB_DONE, result))
+
+    def poll(self):
+        """ drain pending messages, calling on_done / on_failed for finished
+            jobs. returns the (job, kind, value) messages in order
+        """
+        events = []
+        while True:
+            try:
+                event = self.messages.get_nowait()
+            except queue.Empty:
+                break
+
+            job, kind, value = event
+            if JOB_PROGRESS != kind and job in self.jobs:
+                self.jobs.remove(job)
+                #a job cancelled after its work returned is still dropped
+                if JOB_DONE == kind and job.is_cancelled():
+                    event = (job, JOB_CANCELLED, None)
+                elif JOB_DONE == kind and None is not job.on_done:
+                    job.on_done(value)
+                elif JOB_FAILED == kind and None is not job.on_failed:
+                    job.on_failed(value)
+            events.append(event)
+
+        return events
+
+    def is_busy(self):
+        return 0 < len(self.jobs)
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            job.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self.pool.shutdown(wait=False)
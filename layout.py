@@ -0,0 +1,252 @@
+from bisect import bisect_right
+from itertools import chain
+
+import numpy as np
+
+#sheet size (mm) parts are packed onto
+DEFAULT_SHEET_SIZE = (200, 200)
+
+#space (mm) kept between parts and around the edge of each sheet
+DEFAULT_PART_MARGIN = 2
+
+#skylines with at least this many segments are searched with numpy, shorter
+#ones are quicker to walk in python
+SEARCH_TABLE_MIN_SEGMENTS = 128
+
+class Skyline:
+    """ Free space of one sheet as a skyline, the outline left by the top
+        edges of everything placed so far. segments are [x, y, width] from
+        left to right and always cover the full sheet width, touching
+        segments at the same height are merged so the list stays short
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.segments = [[0, 0, width]]
+        #see get_fit_profile and get_search_table, both dropped whenever
+        #the skyline changes
+        self.fit_profile = None
+        self.search_table = None
+
+    def get_fit_profile(self):
+        """ (limits, widths): widths[k] is the widest run of neighbouring
+            segments that are all no higher than limits[k], limits ascending.
+            a rectangle fits somewhere on the sheet exactly when such a run
+            is as wide as it is
+        """
+        if None is not self.fit_profile:
+            return self.fit_profile
+
+        segments = self.segments
+        count = len(segments)
+        ends = [0]
+        for x,y,width in segments:
+            ends.append(ends[-1] + width)
+
+        #for every segment, how far the run around it reaches while no
+        #segment is higher, using a monotonic stack. touching segments are
+        #never the same height, so there are no ties to worry about
+        left = [0] * count
+        right = [count] * count
+        stack = []
+        for k in range(count):
+            while stack and segments[stack[-1]][1] < segments[k][1]:
+                right[stack.pop()] = k
+            left[k] = stack[-1] + 1 if stack else 0
+            stack.append(k)
+
+        limits = []
+        widths = []
+        for limit,width in sorted((segments[k][1], ends[right[k]] - ends[left[k]]) for k in range(count)):
+            limits.append(limit)
+            widths.append(max(width, widths[-1]) if widths else width)
+        self.fit_profile = (limits, widths)
+        return self.fit_profile
+
+    def fits(self, width, height):
+        """ whether a width x height rectangle fits anywhere on the sheet """
+        limits, widths = self.get_fit_profile()
+        k = bisect_right(limits, self.height - height) - 1
+        return 0 <= k and widths[k] >= width
+
+    def get_search_table(self):
+        """ (xs, sparse table) for find_position, rebuilt after the skyline
+            changes. table[k][i] is the highest of the 2**k segments from i
+        """
+        if None is not self.search_table:
+            return self.search_table
+
+        segments = np.fromiter(chain.from_iterable(self.segments), float, 3 * len(self.segments)).reshape(-1,3)
+        table = [segments[:,1]]
+        while 2 ** len(table) <= len(segments):
+            step = 2 ** (len(table) - 1)
+            table.append(np.maximum(table[-1][:-step], table[-1][step:]))
+        self.search_table = (segments[:,0], table)
+        return self.search_table
+
+    def find_position(self, width, height):
+        """ lowest (then leftmost) spot a width x height rectangle fits,
+            returns (top, x, y, segment index) or None
+        """
+        if len(self.segments) >= SEARCH_TABLE_MIN_SEGMENTS:
+            return self.find_position_in_table(width, height)
+
+        best = None
+        segments = self.segments
+        for i,(x,y,segment_width) in enumerate(segments):
+            if x + width > self.width:
+                break
+            #the rectangle rests on the highest segment it spans
+            remaining = width - segment_width
+            j = i
+            while remaining > 0 and j + 1 < len(segments):
+                j = j + 1
+                y = max(y, segments[j][1])
+                remaining = remaining - segments[j][2]
+            top = y + height
+            if top > self.height:
+                continue
+            if None is best or (top, x) < best[:2]:
+                best = (top, x, y, i)
+
+        return best
+
+    def find_position_in_table(self, width, height):
+        """ find_position for long skylines, all starting segments at once """
+        xs, table = self.get_search_table()
+        #the rectangle starts on segment i and spans up to segment last
+        starts = np.arange(np.searchsorted(xs, self.width - width, "right"))
+        if 0 == len(starts):
+            return None
+        last = np.maximum(np.searchsorted(xs, xs[starts] + width, "left") - 1, starts)
+
+        #it rests on the highest segment it spans, covered by two (possibly
+        #overlapping) power of two runs from the table
+        levels = np.log2(last - starts + 1).astype(np.intp)
+        lows = np.empty(len(starts))
+        for level in np.unique(levels).tolist():
+            picked = np.flatnonzero(levels == level)
+            lows[picked] = np.maximum(
+                table[level][starts[picked]],
+                table[level][last[picked] - 2 ** level + 1]
+            )
+
+        tops = lows + height
+        #lowest top that fits, ties go to the leftmost since argmin takes
+        #the first
+        i = int(np.argmin(tops))
+        if tops[i] > self.height:
+            return None
+        return (float(tops[i]), float(xs[i]), float(lows[i]), i)
+
+    def place(self, x, top, width, i):
+        """ raise the skyline to top over [x, x + width), starting at segment i """
+        segments = self.segments
+        segments.insert(i, [x, top, width])
+        end = x + width
+        self.fit_profile = None
+        self.search_table = None
+
+        #trim or drop the segments now underneath the new one
+        j = i + 1
+        while j < len(segments) and segments[j][0] < end:
+            overlap = end - segments[j][0]
+            if overlap < segments[j][2]:
+                segments[j][0] = end
+                segments[j][2] = segments[j][2] - overlap
+                break
+            del segments[j]
+
+        #merge with neighbours at the same height
+        if j < len(segments) and segments[j][1] == top:
+            segments[i][2] = segments[i][2] + segments[j][2]
+            del segments[j]
+        if 0 < i and segments[i - 1][1] == top:
+            segments[i - 1][2] = segments[i - 1][2] + segments[i][2]
+            del segments[i]
+
+def pack_rectangles(sizes, sheet_size=DEFAULT_SHEET_SIZE, margin=DEFAULT_PART_MARGIN, allow_rotation=True):
+    """ Pack (n,2) rectangle sizes onto as many sheets as needed
+        bottom-left skyline packing, tallest rectangles first. every open
+        sheet is tried before a new one is started, with both orientations
+        when allow_rotation is set. sheets that can't take even the
+        smallest rectangle still to come are closed. a rectangle too big for
+        sheet_size either way gets a sheet of its own, just big enough
+        returns (sheets, positions, rotated, sheet_sizes): the sheet index of
+        every rectangle, the (n,2) corner it's placed at (rotated size
+        included, margins already accounted for), whether it's turned by 90
+        degrees and the (width, height) of every sheet
+    """
+    sizes = np.asarray(sizes, dtype=float).reshape(-1,2)
+    sheet_width, sheet_height = sheet_size
+
+    #each part claims its margin on the right and bottom, the sheet gives up
+    #one margin on the left and top
+    padded = sizes + margin
+    usable = (sheet_width - margin, sheet_height - margin)
+
+    sheets = np.zeros(len(sizes), dtype=np.intp)
+    positions = np.zeros((len(sizes),2))
+    rotated = np.zeros(len(sizes), dtype=bool)
+    #(sheet index, skyline) of sheets still taking parts
+    open_sheets = []
+    sheet_sizes = []
+
+    if allow_rotation:
+        order = np.lexsort((-sizes.min(axis=1), -sizes.max(axis=1)))
+    else:
+        order = np.lexsort((-sizes[:,0], -sizes[:,1]))
+    #smallest side of any part from here on, for closing full sheets
+    smallest_left = np.minimum.accumulate(padded[order].min(axis=1)[::-1])[::-1].tolist()
+
+    for position_in_order,index in enumerate(order.tolist()):
+        width, height = padded[index].tolist()
+        orientations = [(width, height, False)]
+        if allow_rotation and width != height:
+            orientations.append((height, width, True))
+        orientations = [orientation for orientation in orientations if orientation[0] <= usable[0] and orientation[1] <= usable[1]]
+        if 0 == len(orientations):
+            sheets[index] = len(sheet_sizes)
+            positions[index] = (margin, margin)
+            sheet_sizes.append((width + margin, height + margin))
+            continue
+
+        #the fit profile is only rebuilt for a sheet that turned a part
+        #away, the sheet being filled right now is just searched directly
+        smallest = smallest_left[position_in_order]
+        open_sheets = [
+            (sheet, skyline) for sheet,skyline in open_sheets
+            if None is skyline.fit_profile or skyline.fits(smallest, smallest)
+        ]
+
+        best = None
+        for sheet,skyline in open_sheets + [(len(sheet_sizes), None)]:
+            if None is skyline:
+                #a fresh sheet has room for anything that passed the size check
+                skyline = Skyline(*usable)
+                open_sheets.append((sheet, skyline))
+                sheet_sizes.append(tuple(sheet_size))
+            for width, height, turned in orientations:
+                if None is not skyline.fit_profile and not skyline.fits(width, height):
+                    continue
+                position = skyline.find_position(width, height)
+                if None is not position and (None is best or position[:2] < best[0][:2]):
+                    best = (position, width, turned)
+            if None is not best:
+                break
+            skyline.get_fit_profile()
+
+        (top, x, y, i), width, turned = best
+        skyline.place(x, top, width, i)
+        sheets[index] = sheet
+        positions[index] = (x + margin, y + margin)
+        rotated[index] = turned
+
+    return sheets, positions, rotated, sheet_sizes
+
+def get_face_bounds(coords, face_offsets):
+    """ (f,2) minimum and (f,2) maximum of the 2d points of every face """
+    starts = np.asarray(face_offsets)[:-1]
+    if 0 == len(starts):
+        return np.zeros((0,2)), np.zeros((0,2))
+    return np.minimum.reduceat(coords, starts), np.maximum.reduceat(coords, starts)
@@ -1,10 +1,40 @@
-from geometry import Model,Triangle,Point,Edge
+import os
+import re
+from geometry import Model,IndexedMesh
 import numpy as np
 
-def get_mesh_extents(mesh):
-    all_points = np.concatenate((mesh.v0, mesh.v1,mesh.v2))
+#vertices closer than this (in model units, mm) are treated as the same vertex
+DEFAULT_WELD_TOLERANCE = 1e-4
+
+#binary stl: 80 byte header, uint32 triangle count, then one 50 byte record
+#per triangle
+STL_HEADER_SIZE = 84
+STL_RECORD_DTYPE = np.dtype([
+    ("normals", "<f4", (3,)),
+    ("vectors", "<f4", (3,3)),
+    ("attr", "<u2"),
+])
+
+#triangles read at a time when streaming a file
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+#coordinates of one ascii stl vertex line, keywords in any case
+ASCII_VERTEX_PATTERN = re.compile(rb"(?i)vertex\s+(\S+\s+\S+\s+\S+)")
+ASCII_FACET_END_PATTERN = re.compile(rb"(?i)endfacet")
+#bytes looked at when telling ascii from binary files
+ASCII_PROBE_SIZE = 4096
+#rough size of one ascii facet, used to size the blocks read from disk
+ASCII_FACET_SIZE = 256
+
+#offsets from a grid cell to itself and half of its neighbours, the other
+#half is covered when the neighbour does its own lookup
+_NEIGHBOUR_CELLS = np.array(
+    [[x,y,z] for x in (-1,0,1) for y in (-1,0,1) for z in (-1,0,1) if (x,y,z) >= (0,0,0)],
+    dtype=np.int64
+)
 
-    extents = [np.amin(all_points, axis=0),np.amax(all_points, axis=0)]
+def get_mesh_extents(mesh):
+    extents = [np.amin(mesh.vectors, axis=(0,1)),np.amax(mesh.vectors, axis=(0,1))]
 
     return extents
 
@@ -24,26 +54,300 @@ def center_mesh(mesh, point):
 
 
 
-def model_from_mesh(mesh):
+def _hash_cells(cells):
+    """ pack integer grid cells into one int64 key per cell
+        collisions are possible, callers must treat a match as a candidate only
+    """
+    return (
+        (cells[:,0] * 73856093) ^ (cells[:,1] * 19349663) ^ (cells[:,2] * 83492791)
+    )
+
+def weld_vertices(points, tolerance=DEFAULT_WELD_TOLERANCE):
+    """ Collapse points that lie within tolerance of each other
+        returns (vertices, inverse) where vertices[inverse] is each input point
+        snapped to the vertex it was welded into
+    """
+    points = np.asarray(points).reshape(-1,3)
+
+    #stl repeats every shared corner exactly, so most of the work is done here
+    vertices, inverse = np.unique(points, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    if tolerance <= 0 or len(vertices) < 2:
+        return vertices, inverse
+
+    #spatial hash on a grid with cells the size of the tolerance, any point
+    #within tolerance must be in the same or a neighbouring cell
+    cells = np.floor(vertices / tolerance).astype(np.int64)
+    keys = _hash_cells(cells)
+    order = np.argsort(keys)
+    cell_keys, cell_start, cell_count = np.unique(keys[order], return_index=True, return_counts=True)
+
+    #collect candidate pairs from every neighbouring cell in bulk
+    pairs_a = []
+    pairs_b = []
+    for offset in _NEIGHBOUR_CELLS:
+        neighbour_keys = _hash_cells(cells + offset)
+        found = np.minimum(np.searchsorted(cell_keys, neighbour_keys), len(cell_keys) - 1)
+        count = np.where(cell_keys[found] == neighbour_keys, cell_count[found], 0)
+        a = np.repeat(np.arange(len(vertices)), count)
+        run_start = np.repeat(np.cumsum(count) - count, count)
+        b = order[np.repeat(cell_start[found], count) + np.arange(len(a)) - run_start]
+        if offset.any():
+            keep = a != b
+        else:
+            #same cell, only take each pair once
+            keep = a < b
+        pairs_a.append(a[keep])
+        pairs_b.append(b[keep])
+    a = np.concatenate(pairs_a)
+    b = np.concatenate(pairs_b)
+
+    #hash collisions and cell neighbours can still be too far apart
+    close = np.sum((vertices[a] - vertices[b])**2, axis=1) <= tolerance * tolerance
+    a = a[close]
+    b = b[close]
+
+    #label each group of touching points with its lowest index
+    remap = np.arange(len(vertices))
+    while len(a):
+        lowest = np.minimum(remap[a], remap[b])
+        new_remap = remap.copy()
+        np.minimum.at(new_remap, a, lowest)
+        np.minimum.at(new_remap, b, lowest)
+        new_remap = new_remap[new_remap]
+        if np.array_equal(new_remap, remap):
+            break
+        remap = new_remap
+
+    #compact the table down to the vertices that were kept
+    kept = remap == np.arange(len(vertices))
+    new_index = np.cumsum(kept) - 1
+    return vertices[kept], new_index[remap][inverse]
+
+def get_kept_faces(faces):
+    """ mask of the welded triangles worth keeping, the ones that collapsed
+        to a line or point are dropped and so are repeats of an earlier
+        triangle over the same corners, whichever corner it starts from
+    """
+    faces = np.asarray(faces)
+    keep = (
+        (faces[:,0] != faces[:,1]) &
+        (faces[:,1] != faces[:,2]) &
+        (faces[:,2] != faces[:,0])
+    )
+    #rotate each triangle to start at its lowest id, winding is kept so a
+    #back to back pair isn't mistaken for a repeat
+    start = np.argmin(faces, axis=1)
+    rotated = faces[np.arange(len(faces))[:,None], (start[:,None] + np.arange(3)) % 3]
+    _, first = np.unique(rotated, axis=0, return_index=True)
+    unique = np.zeros(len(faces), dtype=bool)
+    unique[first] = True
+    return keep & unique
+
+def indexed_mesh_from_vectors(vectors, normals, weld_tolerance=DEFAULT_WELD_TOLERANCE):
+    """ build an IndexedMesh from per triangle corners, (m,3,3) as stored in
+        an stl file. triangles that collapse when welded are dropped
+    """
+    vertices, inverse = weld_vertices(vectors, weld_tolerance)
+    faces = inverse.reshape(-1,3)
+    keep = get_kept_faces(faces)
+    return IndexedMesh(vertices, faces[keep], np.asarray(normals)[keep])
+
+def model_from_mesh(mesh, weld_tolerance=DEFAULT_WELD_TOLERANCE):
     extents = get_mesh_extents(mesh)
     center_mesh(mesh,[0,(extents[0][1]-extents[1][1])/2,extents[0][2]])
 
-    model = Model()
-    for i in range(len(mesh.vectors)):
-        e1 = Edge([
-            Point(mesh.vectors[i][0][0],mesh.vectors[i][0][1],mesh.vectors[i][0][2]),
-            Point(mesh.vectors[i][1][0],mesh.vectors[i][1][1],mesh.vectors[i][1][2])
-        ])
-        e2 = Edge([
-            Point(mesh.vectors[i][1][0],mesh.vectors[i][1][1],mesh.vectors[i][1][2]),
-            Point(mesh.vectors[i][2][0],mesh.vectors[i][2][1],mesh.vectors[i][2][2])
-        ])
-        e3 = Edge([
-            Point(mesh.vectors[i][2][0],mesh.vectors[i][2][1],mesh.vectors[i][2][2]),
-            Point(mesh.vectors[i][0][0],mesh.vectors[i][0][1],mesh.vectors[i][0][2])
-        ])
-
-        model.add_face(
-            Triangle(e1,e2,e3, mesh.normals[i])
-        )
-    return model
+    indexed_mesh = indexed_mesh_from_vectors(mesh.vectors, mesh.normals, weld_tolerance)
+    return Model(indexed_mesh)
+
+def is_binary_stl(filename):
+    """ ascii files can also start with "solid" and binary ones often do,
+        so a record count matching the file size decides. otherwise files
+        with a vertex line near the start are ascii, as are shorter ones
+        starting with "solid" (the ascii reader reports what's wrong). the
+        rest is binary, any trailing bytes are ignored
+    """
+    size = os.path.getsize(filename)
+    if size < STL_HEADER_SIZE:
+        return False
+    count = int(np.fromfile(filename, dtype="<u4", count=1, offset=STL_HEADER_SIZE - 4)[0])
+    expected_size = STL_HEADER_SIZE + count * STL_RECORD_DTYPE.itemsize
+    if size == expected_size:
+        return True
+
+    with open(filename, "rb") as f:
+        head = f.read(ASCII_PROBE_SIZE)
+    if head.lstrip().lower().startswith(b"solid"):
+        return size > expected_size and None is ASCII_VERTEX_PATTERN.search(head)
+    return True
+
+def read_binary_stl(filename):
+    """ Memory map a binary stl, returns a read only structured array with
+        normals, vectors and attr fields. nothing is read until used
+    """
+    count = int(np.fromfile(filename, dtype="<u4", count=1, offset=STL_HEADER_SIZE - 4)[0])
+    expected_size = STL_HEADER_SIZE + count * STL_RECORD_DTYPE.itemsize
+    if os.path.getsize(filename) < expected_size:
+        raise Exception("truncated binary stl, expected %i triangles" % count)
+    if 0 == count:
+        return np.zeros(0, dtype=STL_RECORD_DTYPE)
+    return np.memmap(filename, dtype=STL_RECORD_DTYPE, mode="r", offset=STL_HEADER_SIZE, shape=(count,))
+
+def iter_binary_stl(filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """ yield (vectors, normals) for up to chunk_size triangles at a time
+        normals are recalculated from the vertices, like numpy-stl does
+    """
+    records = read_binary_stl(filename)
+    #anything past the records (padding some exporters add) is ignored
+    for start in range(0, len(records), chunk_size):
+        vectors = np.asarray(records["vectors"][start:start + chunk_size], dtype=np.float32)
+        yield vectors, np.cross(vectors[:,1] - vectors[:,0], vectors[:,2] - vectors[:,0])
+
+def parse_ascii_stl(data):
+    """ Parse the facets in a block of ascii stl text (bytes) in one pass,
+        returns (n,3,3) float32 vectors. facet normal lines are ignored
+        since normals are recalculated anyway
+    """
+    coordinates = b" ".join(ASCII_VERTEX_PATTERN.findall(data))
+    vectors = np.fromstring(coordinates.decode("ascii"), dtype=np.float32, sep=" ")
+    if len(vectors) % 9:
+        raise Exception("malformed ascii stl, facets need three vertexes")
+    return vectors.reshape(-1,3,3)
+
+def find_last_facet_end(data):
+    """ offset just past the last endfacet in data, 0 if there is none
+        only the tail is searched, widened until something turns up
+    """
+    window = ASCII_FACET_SIZE
+    while True:
+        start = max(0, len(data) - window)
+        ends = [match.end() for match in ASCII_FACET_END_PATTERN.finditer(data, start)]
+        if ends:
+            return ends[-1]
+        if 0 == start:
+            return 0
+        window = window * 4
+
+def iter_ascii_stl(filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """ yield (vectors, normals) for roughly chunk_size triangles at a time
+        the file is read in blocks cut after the last complete facet
+    """
+    block_size = chunk_size * ASCII_FACET_SIZE
+    remainder = b""
+    facet_count = 0
+    with open(filename, "rb") as f:
+        if not f.read(len(b"solid")).lower() == b"solid":
+            raise Exception("not an stl file: " + filename)
+        f.seek(0)
+        while True:
+            block = f.read(block_size)
+            data = remainder + block
+            if block:
+                cut = find_last_facet_end(data)
+                data, remainder = data[:cut], data[cut:]
+            vectors = parse_ascii_stl(data)
+            facet_count = facet_count + len(vectors)
+            if len(vectors):
+                yield vectors, np.cross(vectors[:,1] - vectors[:,0], vectors[:,2] - vectors[:,0])
+            if not block:
+                break
+
+    #a misdetected binary file or an unknown dialect, not an empty model
+    if 0 == facet_count:
+        raise Exception("no facets found in " + filename)
+
+def iter_stl(filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """ yield (vectors, normals) chunks from a binary or ascii stl """
+    if is_binary_stl(filename):
+        return iter_binary_stl(filename, chunk_size)
+    return iter_ascii_stl(filename, chunk_size)
+
+def get_mass_sums(vectors):
+    """ partial sums of the polyhedral mass integrals used by numpy-stl's
+        get_mass_properties, (volume, x, y, z). they add up across chunks
+    """
+    x = vectors[:,:,0].astype(float)
+    y = vectors[:,:,1].astype(float)
+    z = vectors[:,:,2].astype(float)
+    a1, b1, c1 = x[:,1] - x[:,0], y[:,1] - y[:,0], z[:,1] - z[:,0]
+    a2, b2, c2 = x[:,2] - x[:,0], y[:,2] - y[:,0], z[:,2] - z[:,0]
+    d0, d1, d2 = b1 * c2 - b2 * c1, a2 * c1 - a1 * c2, a1 * b2 - a2 * b1
+
+    def second_order(w):
+        w0, w1, w2 = w[:,0], w[:,1], w[:,2]
+        return w0*w0 + w1*(w0 + w1) + w2*(w0 + w1 + w2)
+
+    return np.array([
+        np.sum(d0 * (x[:,0] + x[:,1] + x[:,2])) / 6,
+        np.sum(d0 * second_order(x)) / 24,
+        np.sum(d1 * second_order(y)) / 24,
+        np.sum(d2 * second_order(z)) / 24
+    ])
+
+def model_from_chunks(get_chunks, weld_tolerance=DEFAULT_WELD_TOLERANCE, progress=None):
+    """ Build a centered, welded Model from a stream of triangles
+        get_chunks: called with no arguments, returns an iterator of
+        (vectors, normals) chunks. it is called twice, once to measure the
+        mesh and once to weld it, so only one chunk of raw triangles is held
+        in memory at a time
+        progress: optional callback(fraction, message) called once per chunk,
+        raising from it abandons the load
+    """
+    #first pass, extents and center of gravity
+    low = np.full(3, np.inf)
+    high = np.full(3, -np.inf)
+    mass_sums = np.zeros(4)
+    triangle_count = 0
+    for vectors, normals in get_chunks():
+        if None is not progress:
+            progress(0, "reading %i triangles" % triangle_count)
+        triangle_count = triangle_count + len(vectors)
+        if 0 == len(vectors):
+            continue
+        low = np.minimum(low, np.amin(vectors, axis=(0,1)))
+        high = np.maximum(high, np.amax(vectors, axis=(0,1)))
+        mass_sums += get_mass_sums(vectors)
+
+    #second pass, weld each chunk on its own so only compact vertex tables
+    #and indexes are kept
+    chunk_vertices = []
+    chunk_faces = []
+    chunk_normals = []
+    vertex_count = 0
+    welded_count = 0
+    for vectors, normals in get_chunks():
+        if None is not progress:
+            progress(.9 * welded_count / triangle_count, "welding vertices")
+        welded_count = welded_count + len(vectors)
+        vertices, inverse = weld_vertices(vectors, weld_tolerance)
+        chunk_vertices.append(vertices)
+        chunk_faces.append(inverse.reshape(-1,3) + vertex_count)
+        chunk_normals.append(np.asarray(normals))
+        vertex_count = vertex_count + len(vertices)
+
+    if 0 == vertex_count:
+        return Model(IndexedMesh(np.zeros((0,3)), np.zeros((0,3), dtype=np.intp), np.zeros((0,3))))
+
+    #then weld the chunks together
+    if None is not progress:
+        progress(.9, "welding chunks")
+    vertices, remap = weld_vertices(np.concatenate(chunk_vertices), weld_tolerance)
+    faces = remap[np.concatenate(chunk_faces)]
+    normals = np.concatenate(chunk_normals)
+    keep = get_kept_faces(faces)
+
+    #same placement as center_mesh in model_from_mesh
+    center_of_gravity = mass_sums[1:] / mass_sums[0] if mass_sums[0] else (low + high) / 2
+    vertices = vertices + (center_of_gravity - np.array([0, (low[1] - high[1])/2, low[2]]))
+
+    return Model(IndexedMesh(vertices, faces[keep], normals[keep]))
+
+def model_from_file(filename, weld_tolerance=DEFAULT_WELD_TOLERANCE, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """ Load a binary or ascii stl chunk_size triangles at a time, without
+        going through numpy-stl. binary files are read from a memory map
+    """
+    return model_from_chunks(
+        lambda: iter_stl(filename, chunk_size),
+        weld_tolerance,
+        progress
+    )
@@ -0,0 +1,171 @@
+import hashlib
+import os
+import weakref
+import zipfile
+
+import numpy as np
+
+from geometry import IndexedMesh, Model, NORMAL_DECIMALS, DEFAULT_REDUCTION_WORKERS, model_from_loop_arrays
+from meshloader import model_from_file, DEFAULT_WELD_TOLERANCE
+
+#bump when the layout of cached arrays changes, old entries are then ignored
+CACHE_FORMAT_VERSION = 1
+
+#least recently used entries are dropped once the cache grows past this
+DEFAULT_CACHE_SIZE = 1 << 30
+
+#bytes hashed at a time
+HASH_BLOCK_SIZE = 1 << 20
+
+def get_default_cache_directory():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "faceyanker")
+
+def get_file_hash(filename, progress=None):
+    """ sha256 of the file contents, so renamed or copied files still hit
+        progress: optional callback(fraction, message), called between
+        blocks, raising from it abandons the hash
+    """
+    digest = hashlib.sha256()
+    size = max(os.path.getsize(filename), 1)
+    done = 0
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            if None is not progress:
+                progress(done / size, "checking cache")
+            digest.update(block)
+            done = done + len(block)
+    return digest.hexdigest()
+
+class ModelCache:
+    """ On disk cache of imported (welded) and reduced models
+        entries are uncompressed npz files named after a hash of the stl
+        contents and every parameter that changes the result. reading one
+        bumps its modification time, which is what eviction goes by
+    """
+    def __init__(self, directory=None, max_size=DEFAULT_CACHE_SIZE):
+        self.directory = directory or get_default_cache_directory()
+        self.max_size = max_size
+        #model -> (file hash, weld tolerance, version when loaded), so a
+        #reduction can find its way back to the file
+        self.sources = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    def get_entry_filename(self, content_hash, kind, *params):
+        key = ":".join(str(part) for part in (CACHE_FORMAT_VERSION, content_hash, kind) + params)
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".npz")
+
+    def get_arrays(self, entry_filename, *names):
+        """ dict of the named arrays stored in an entry, None if it isn't
+            cached. entries that can't be read are deleted
+        """
+        try:
+            with np.load(entry_filename) as data:
+                arrays = {name: data[name] for name in names}
+            os.utime(entry_filename)
+        except OSError:
+            #missing or evicted meanwhile
+            self.misses = self.misses + 1
+            return None
+        except (ValueError, KeyError, zipfile.BadZipFile):
+            #corrupt, or missing arrays, it would never load so make room
+            #for a fresh one
+            self.misses = self.misses + 1
+            try:
+                os.remove(entry_filename)
+            except OSError:
+                pass
+            return None
+
+        self.hits = self.hits + 1
+        return arrays
+
+    def put_arrays(self, entry_filename, **arrays):
+        """ store arrays as an entry. the cache is only a shortcut, failing
+            to write it (no directory, no permission, disk full) is ignored
+        """
+        #written aside and renamed, so readers (or other processes) never
+        #see half an entry
+        partial_filename = "%s.%i.part" % (entry_filename, os.getpid())
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(partial_filename, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(partial_filename, entry_filename)
+            self.evict()
+        except OSError:
+            try:
+                os.remove(partial_filename)
+            except OSError:
+                pass
+
+    def evict(self):
+        """ drop least recently used entries until the cache fits max_size """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(entry[1] for entry in entries)
+        for mtime,size,name in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total = total - size
+
+    def load_model(self, filename, weld_tolerance=DEFAULT_WELD_TOLERANCE, progress=None):
+        """ model_from_file, served from the cache when this file has been
+            imported with the same tolerance before
+        """
+        content_hash = get_file_hash(filename, progress)
+        entry_filename = self.get_entry_filename(content_hash, "mesh", weld_tolerance)
+        arrays = self.get_arrays(entry_filename, "vertices", "faces", "normals")
+        if None is not arrays:
+            model = Model(IndexedMesh(arrays["vertices"], arrays["faces"], arrays["normals"]))
+        else:
+            model = model_from_file(filename, weld_tolerance, progress=progress)
+            self.put_arrays(
+                entry_filename,
+                vertices=model.mesh.vertices,
+                faces=model.mesh.faces,
+                normals=model.mesh.normals
+            )
+
+        self.sources[model] = (content_hash, weld_tolerance, model.version)
+        return model
+
+    def get_reduced_model(self, model, workers=DEFAULT_REDUCTION_WORKERS, progress=None):
+        """ model.get_reduced_model, served from the cache for models that
+            came from load_model and haven't been changed since
+        """
+        source = self.sources.get(model)
+        if None is source or source[2] != model.version:
+            return model.get_reduced_model(workers, progress)
+
+        content_hash, weld_tolerance, version = source
+        entry_filename = self.get_entry_filename(content_hash, "reduced", weld_tolerance, NORMAL_DECIMALS)
+        arrays = self.get_arrays(entry_filename, "coords", "face_offsets", "loop_offsets", "normals")
+        if None is not arrays:
+            return model_from_loop_arrays(
+                arrays["coords"], arrays["face_offsets"], arrays["loop_offsets"], arrays["normals"]
+            )
+
+        reduced_model = model.get_reduced_model(workers, progress)
+        coords, face_offsets, loop_offsets, normals = reduced_model.to_loop_arrays()
+        self.put_arrays(
+            entry_filename,
+            coords=coords,
+            face_offsets=face_offsets,
+            loop_offsets=loop_offsets,
+            normals=normals
+        )
+        return reduced_model
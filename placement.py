@@ -0,0 +1,68 @@
+class ModelPlacement:
+    """The model in the context of a scene"""
+    def __init__(self,reference,model,location,orientation):
+        self.model = model
+        self.location = location
+        self.orientation = orientation
+        self.reference = reference
+        self.active_face = None
+        #mesh backed models build a new Face on every access, the active one
+        #is kept (with its cached geometry) while the model is unchanged
+        self.active_face_cache = None
+
+    def set_active_face_index(self,face_index):
+        self.active_face = face_index
+
+    def get_active_face(self):
+        if None is self.active_face:
+            return None
+
+        key = (self.model, self.model.version, self.active_face)
+        if None is self.active_face_cache or self.active_face_cache[0] != key:
+            self.active_face_cache = (key, self.model.faces[self.active_face])
+        return self.active_face_cache[1]
+
+    def hash_face_by_index(self,face_index):
+        #todo, some unique hash using face coords and normal
+        return hex(face_index)
+
+class Scene:
+    """A collection of modelplacements"""
+    def __init__(self):
+        self.model_placements = {}
+
+    def add_model(self,reference,model,location,orientation):
+        placement = ModelPlacement(reference, model, location, orientation)
+        self.model_placements[placement.reference] = placement
+
+    def get_model(self,reference):
+        placement = self.get_model_placement(reference)
+        return placement.model
+
+    def get_model_placement(self,reference):
+        return self.model_placements[reference]
+
+    def get_placement_snapshot(self):
+        """ copies of every placement, for background jobs to read while the
+            scene itself keeps changing
+        """
+        snapshot = []
+        for placement in self.model_placements.values():
+            copy = ModelPlacement(placement.reference, placement.model, placement.location, placement.orientation)
+            copy.active_face = placement.active_face
+            snapshot.append(copy)
+        return snapshot
+
+    def swap_model(self,reference,old_model,new_model):
+        """ replace a placement's model in one step, but only if it still holds
+            old_model. returns False if the placement was removed or changed
+            while new_model was being built
+        """
+        placement = self.model_placements.get(reference)
+        if None is placement or placement.model is not old_model:
+            return False
+
+        placement.model = new_model
+        #face indexes don't carry over to a different model
+        placement.active_face = None
+        return True
@@ -0,0 +1,198 @@
+""" Project files, a whole scene saved in one file
+    a short json header (placements, active faces, viewport) is followed by
+    the geometry of every model as raw arrays, each starting on a page
+    boundary so loading just memory maps them. nothing is read from disk
+    until a model is rendered or exported, and then only the pages it needs
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+from geometry import Model, IndexedMesh, PolygonMesh
+from placement import Scene
+
+#first bytes of every project file
+PROJECT_MAGIC = b"FYPROJ\x00\x00"
+
+#bump when the layout changes, newer files are refused by older code
+PROJECT_FORMAT_VERSION = 1
+
+#arrays start at multiples of this, so they map onto whole pages
+ARRAY_ALIGNMENT = 4096
+
+#viewport attributes stored with the project
+VIEWPORT_SETTINGS = ("zoom_level", "offset", "perspective")
+
+def get_viewport_settings(viewport):
+    """ the parts of a scene.Viewport worth saving, as plain json values """
+    return {name: np.asarray(getattr(viewport, name)).tolist() for name in VIEWPORT_SETTINGS}
+
+def apply_viewport_settings(viewport, settings):
+    for name in VIEWPORT_SETTINGS:
+        if name in settings:
+            setattr(viewport, name, settings[name])
+
+def get_model_arrays(model):
+    """ (kind, arrays) describing a model, triangle meshes are kept as they
+        are, anything else is stored as polygon loops
+    """
+    if None is not model.mesh:
+        return "mesh", {
+            "vertices": model.mesh.vertices,
+            "faces": model.mesh.faces,
+            "normals": model.mesh.normals
+        }
+
+    coords, face_offsets, loop_offsets, normals = model.to_loop_arrays()
+    return "loops", {
+        "coords": np.asarray(coords, dtype=float).reshape(-1,3),
+        "face_offsets": np.asarray(face_offsets, dtype=np.intp),
+        "loop_offsets": np.asarray(loop_offsets, dtype=np.intp),
+        "normals": np.asarray(normals, dtype=float).reshape(-1,3)
+    }
+
+def get_aligned(offset):
+    return -(-offset // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+def save_project(filename, placements, viewport_settings=None, progress=None):
+    """ Save placements (an iterable of ModelPlacement, see
+        Scene.get_placement_snapshot) with their models and active faces
+        viewport_settings: optional, see get_viewport_settings
+        progress: optional callback(fraction, message), raising from it
+        abandons the save and leaves any existing file untouched
+        on windows a file can't be replaced while it's mapped, to save over
+        the project models were loaded from pass them through unmap_model
+        first (and drop anything else still holding their arrays)
+    """
+    placements = list(placements)
+    entries = []
+    arrays = []
+    offset = 0
+    for placement in placements:
+        kind, model_arrays = get_model_arrays(placement.model)
+        layout = {}
+        for name,array in model_arrays.items():
+            array = np.ascontiguousarray(array)
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            arrays.append((offset, array))
+            offset = get_aligned(offset + array.nbytes)
+
+        entries.append({
+            "reference": placement.reference,
+            "location": None if None is placement.location else np.asarray(placement.location).tolist(),
+            "orientation": None if None is placement.orientation else np.asarray(placement.orientation).tolist(),
+            "active_face": None if None is placement.active_face else int(placement.active_face),
+            "kind": kind,
+            "arrays": layout
+        })
+
+    header = json.dumps({
+        "version": PROJECT_FORMAT_VERSION,
+        "viewport": viewport_settings,
+        "placements": entries
+    }).encode("utf-8")
+    #array offsets in the header count from the first page after it
+    data_start = get_aligned(len(PROJECT_MAGIC) + 8 + len(header))
+
+    #written aside and renamed, an interrupted save never clobbers the old file
+    partial_filename = filename + ".part"
+    try:
+        with open(partial_filename, "wb") as f:
+            f.write(PROJECT_MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for i,(array_offset,array) in enumerate(arrays):
+                if None is not progress:
+                    progress(i / len(arrays), "writing " + os.path.basename(filename))
+                f.seek(data_start + array_offset)
+                array.tofile(f)
+            #pad out the last page so every mapping stays inside the file
+            f.truncate(data_start + offset)
+        os.replace(partial_filename, filename)
+    except:
+        if os.path.exists(partial_filename):
+            os.remove(partial_filename)
+        raise
+
+def read_project_header(filename):
+    """ (header, data_start) of a project file """
+    with open(filename, "rb") as f:
+        if PROJECT_MAGIC != f.read(len(PROJECT_MAGIC)):
+            raise Exception(filename + " is not a project file")
+        header_size, = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size).decode("utf-8"))
+
+    if header["version"] > PROJECT_FORMAT_VERSION:
+        raise Exception("%s was saved by a newer version (format %i)" % (filename, header["version"]))
+    return header, get_aligned(len(PROJECT_MAGIC) + 8 + header_size)
+
+def map_array(filename, data_start, layout):
+    """ read only memory map of one array from a project file """
+    shape = tuple(layout["shape"])
+    dtype = np.dtype(layout["dtype"])
+    if 0 == int(np.prod(shape)):
+        #empty files and empty mappings aren't allowed, nothing to read anyway
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(filename, dtype=dtype, mode="r", offset=data_start + layout["offset"], shape=shape)
+
+def get_mapped_filename(array):
+    """ file an array (or the array it's a view of) is mapped from, None
+        for arrays in memory
+    """
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap):
+            return array.filename
+        array = array.base
+    return None
+
+def unmap_model(model, filename):
+    """ model itself, or a copy held in memory when any of its arrays are
+        mapped from filename
+    """
+    if None is model.mesh and None is model.loops:
+        return model
+
+    kind, arrays = get_model_arrays(model)
+    mapped = [get_mapped_filename(array) for array in arrays.values()]
+    if not any(None is not name and os.path.exists(filename) and os.path.samefile(name, filename) for name in mapped):
+        return model
+
+    arrays = {name: np.array(array) for name,array in arrays.items()}
+    if "mesh" == kind:
+        return Model(IndexedMesh(arrays["vertices"], arrays["faces"], arrays["normals"]))
+    return Model(loops=PolygonMesh(
+        arrays["coords"], arrays["face_offsets"], arrays["loop_offsets"], arrays["normals"]
+    ))
+
+def load_project(filename):
+    """ Open a project saved with save_project
+        model geometry stays on disk, memory mapped, until it's used. the
+        file must not be changed in place while the scene is open, saving
+        over it works once the models are unmapped, see save_project
+        returns (scene, viewport settings or None)
+    """
+    header, data_start = read_project_header(filename)
+    scene = Scene()
+    for entry in header["placements"]:
+        arrays = {name: map_array(filename, data_start, layout) for name,layout in entry["arrays"].items()}
+        if "mesh" == entry["kind"]:
+            model = Model(IndexedMesh(arrays["vertices"], arrays["faces"], arrays["normals"]))
+        elif "loops" == entry["kind"]:
+            model = Model(loops=PolygonMesh(
+                arrays["coords"], arrays["face_offsets"], arrays["loop_offsets"], arrays["normals"]
+            ))
+        else:
+            raise Exception("unknown model kind " + str(entry["kind"]))
+
+        location = entry["location"]
+        scene.add_model(
+            entry["reference"],
+            model,
+            None if None is location else tuple(location),
+            entry["orientation"]
+        )
+        scene.get_model_placement(entry["reference"]).set_active_face_index(entry["active_face"])
+
+    return scene, header["viewport"]
@@ -0,0 +1,104 @@
+import numpy as np
+import pygame
+
+#light direction in view space, pointing from the light into the scene
+DEFAULT_LIGHT_DIRECTION = (-.3, -.5, 1)
+DEFAULT_AMBIENT_LIGHT = .3
+DEFAULT_SOLID_COLOR = (120,160,220)
+
+def shade_faces(view_normals, light_direction=DEFAULT_LIGHT_DIRECTION,
+        color=DEFAULT_SOLID_COLOR, ambient=DEFAULT_AMBIENT_LIGHT):
+    """ flat shade (f,3) unit normals in view space, returns (f,3) uint8 colors
+        both sides of a face are lit the same so open meshes still read well
+    """
+    light = np.asarray(light_direction, dtype=float)
+    light = light / np.linalg.norm(light)
+    intensity = ambient + (1 - ambient) * np.abs(np.dot(view_normals, light))
+    return np.clip(
+        intensity[:,None] * np.asarray(color, dtype=float), 0, 255
+    ).astype(np.uint8)
+
+def get_polygon_spans(coords, face_ids, loop_offsets, dimensions):
+    """ Scan convert polygons (with holes) using the even-odd rule
+        coords: (n,2) screen coordinates of loop points, loops end to end
+        face_ids: (n,) face each point belongs to
+        loop_offsets: (l+1,) where each loop starts in coords
+
+        all faces are converted at once, pixel centers are sampled
+        returns (span_faces, span_rows, span_starts, span_ends), columns
+        are clipped to the screen and ends are exclusive
+    """
+    width, height = dimensions
+    coords = np.asarray(coords, dtype=float)
+    loop_offsets = np.asarray(loop_offsets)
+
+    #each point connects to the next one in its loop, the last wraps around
+    following = np.arange(1, len(coords) + 1)
+    following[loop_offsets[1:] - 1] = loop_offsets[:-1]
+    x0,y0 = coords[:,0], coords[:,1]
+    x1,y1 = coords[following,0], coords[following,1]
+
+    #rows whose pixel centers (row + .5) each edge crosses
+    first_rows = np.clip(np.ceil(np.minimum(y0,y1) - .5), 0, height).astype(np.intp)
+    end_rows = np.clip(np.ceil(np.maximum(y0,y1) - .5), 0, height).astype(np.intp)
+    counts = end_rows - first_rows
+
+    edges = np.repeat(np.arange(len(coords)), counts)
+    rows = np.repeat(first_rows, counts) + np.arange(len(edges)) - np.repeat(np.cumsum(counts) - counts, counts)
+    centers = rows + .5
+    crossings = x0[edges] + (centers - y0[edges]) * (x1[edges] - x0[edges]) / (y1[edges] - y0[edges])
+    crossing_faces = np.asarray(face_ids)[edges]
+
+    #sort crossings along each row of each face and pair them up
+    order = np.lexsort((crossings, rows, crossing_faces))
+    crossings = crossings[order]
+    rows = rows[order]
+    crossing_faces = crossing_faces[order]
+    group_start = np.concatenate(([True], (rows[1:] != rows[:-1]) | (crossing_faces[1:] != crossing_faces[:-1])))
+    group_index = np.arange(len(rows)) - np.maximum.accumulate(np.where(group_start, np.arange(len(rows)), 0))
+    openings = np.flatnonzero(group_index % 2 == 0)
+    openings = openings[openings + 1 < len(rows)]
+
+    span_starts = np.clip(np.ceil(crossings[openings] - .5), 0, width).astype(np.intp)
+    span_ends = np.clip(np.ceil(crossings[openings + 1] - .5), 0, width).astype(np.intp)
+    keep = span_ends > span_starts
+    return (
+        crossing_faces[openings][keep],
+        rows[openings][keep],
+        span_starts[keep],
+        span_ends[keep]
+    )
+
+def rasterize_faces(surface, coords, face_ids, loop_offsets, face_depths, face_colors):
+    """ Fill polygons straight into a pygame surface through surfarray, the
+        face nearest the camera wins each pixel
+        face_depths: (f,) distance of each face from the camera
+        face_colors: (f,3) uint8 color of each face
+    """
+    width, height = surface.get_size()
+    span_faces, span_rows, span_starts, span_ends = get_polygon_spans(
+        coords, face_ids, loop_offsets, (width, height)
+    )
+    if 0 == len(span_faces):
+        return
+
+    #expand spans to one entry per pixel
+    lengths = span_ends - span_starts
+    pixel_faces = np.repeat(span_faces, lengths)
+    columns = (
+        np.repeat(span_starts, lengths) + np.arange(len(pixel_faces))
+        - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    )
+    pixels = np.repeat(span_rows, lengths) * width + columns
+
+    #depth test, keep the nearest face for every pixel
+    order = np.lexsort((np.asarray(face_depths)[pixel_faces], pixels))
+    pixels = pixels[order]
+    nearest = np.concatenate(([True], pixels[1:] != pixels[:-1]))
+    pixels = pixels[nearest]
+    pixel_faces = pixel_faces[order][nearest]
+
+    buffer = pygame.surfarray.pixels3d(surface)
+    buffer[pixels % width, pixels // width] = np.asarray(face_colors)[pixel_faces]
+    #release the surface lock
+    del buffer
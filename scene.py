@@ -3,7 +3,10 @@ from math import tan
 import numpy as np
 import pygame
 
-from geometry import get_ordered_points_from_edges
+from geometry import get_ordered_points_from_edges, get_edge_strips, get_unique_edges
+from rasterizer import shade_faces, rasterize_faces
+#placements don't need pygame, they live apart so headless tools can use them
+from placement import ModelPlacement, Scene
 
 #constants to describe different screen perspectives
 SCENE_PERSPECTIVE_FRONT = 0
@@ -15,6 +18,27 @@ SCENE_PERSPECTIVE_BACK = 5
 
 DEFAULT_PERSPECTIVE = SCENE_PERSPECTIVE_FRONT
 
+#how faces are drawn
+RENDER_MODE_WIREFRAME = 0
+RENDER_MODE_SOLID = 1
+
+#rotation from model space into view space for each perspective,
+#row i gives the view axis i in terms of model x,y,z
+PERSPECTIVE_MATRICES = {
+    SCENE_PERSPECTIVE_FRONT: np.array([[1,0,0],[0,1,0],[0,0,1]], dtype=float),
+    SCENE_PERSPECTIVE_TOP: np.array([[1,0,0],[0,0,1],[0,1,0]], dtype=float),
+    SCENE_PERSPECTIVE_LEFT: np.array([[0,0,-1],[0,1,0],[1,0,0]], dtype=float),
+    SCENE_PERSPECTIVE_RIGHT: np.array([[0,0,1],[0,1,0],[-1,0,0]], dtype=float),
+    SCENE_PERSPECTIVE_BOTTOM: np.array([[1,0,0],[0,0,-1],[0,1,0]], dtype=float),
+    SCENE_PERSPECTIVE_BACK: np.array([[-1,0,0],[0,1,0],[0,0,-1]], dtype=float),
+}
+
+#projected coordinates are clipped to this so they stay valid for pygame
+MAX_SCREEN_COORDINATE = 32767
+
+#points closer to the camera than this (or behind it) are not drawn
+NEAR_PLANE_DEPTH = .1
+
 MAX_ZOOM_LEVEL = -10
 MIN_ZOOM_LEVEL = -400
 DEFAULT_ZOOM_LEVEL = -30
@@ -28,45 +52,7 @@ DEFAULT_EDGE_COLOR = (0,0,200)
 DEFAULT_BACKGROUND_COLOR = (255,255,255)
 DEFAULT_ACTIVE_FACE_COLOR = (30,30,200,100)
 
-from geometry import Point
-
-class ModelPlacement:
-    """The model in the context of a scene"""
-    def __init__(self,reference,model,location,orientation):
-        self.model = model
-        self.location = location
-        self.orientation = orientation
-        self.reference = reference
-        self.active_face = None
-
-    def set_active_face_index(self,face_index):
-        self.active_face = face_index
-
-    def get_active_face(self):
-        if None is not self.active_face:
-            return self.model.faces[self.active_face]
-
-        return None
-
-    def hash_face_by_index(self,face_index):
-        #todo, some unique hash using face coords and normal
-        return hex(face_index)
-
-class Scene:
-    """A collection of modelplacements"""
-    def __init__(self):
-        self.model_placements = {}
-
-    def add_model(self,reference,model,location,orientation):
-        placement = ModelPlacement(reference, model, location, orientation)
-        self.model_placements[placement.reference] = placement
-
-    def get_model(self,reference):
-        placement = self.get_model_placement(reference)
-        return placement.model
-
-    def get_model_placement(self,reference):
-        return self.model_placements[reference]
+VERTEX_MARKER_RADIUS = 2
 
 class SceneViewer():
     def __init__(self, scene, dimensions):
@@ -75,12 +61,32 @@ class SceneViewer():
         self.viewport = Viewport(dimensions)
         self.screen = self.init_pygame_canvas()
 
+        #everything except the active face overlay is drawn here and only
+        #redrawn when the render state changes
+        self.base_layer = pygame.Surface(self.dimensions)
+        self.base_layer_state = None
+
+        #alpha layer for active faces, allocated once and reused
+        self.overlay = pygame.Surface(self.dimensions, pygame.SRCALPHA)
+        self.overlay_rects = []
+
+        self.vertex_marker = self.init_vertex_marker()
+
+        #per placement reference, see get_model_geometry / get_projection
+        self.geometry_cache = {}
+        self.projection_cache = {}
+
         self.show_normals = True
         self.normal_color = DEFAULT_NORMAL_COLOR
 
         self.show_grid = True
         self.grid_color = DEFAULT_NORMAL_COLOR
 
+        #skip faces pointing away from the camera
+        self.cull_backfaces = True
+
+        self.render_mode = RENDER_MODE_WIREFRAME
+
         self.update()
 
     def init_pygame_canvas(self):
@@ -90,6 +96,21 @@ class SceneViewer():
         pygame.display.update()
         return screen
 
+    def init_vertex_marker(self):
+        """ small sprite blitted at every vertex """
+        size = VERTEX_MARKER_RADIUS*2 + 1
+        marker = pygame.Surface((size,size))
+        marker.fill(DEFAULT_BACKGROUND_COLOR)
+        marker.set_colorkey(DEFAULT_BACKGROUND_COLOR)
+        pygame.draw.circle(
+            marker,
+            (1,1,1),
+            (VERTEX_MARKER_RADIUS,VERTEX_MARKER_RADIUS),
+            VERTEX_MARKER_RADIUS,
+            2
+        )
+        return marker
+
     def set_perspective(self, perspective):
         self.viewport.perspective = perspective
 
@@ -112,91 +133,347 @@ class SceneViewer():
 
         self.show_normals = val
 
+    def set_render_mode(self, render_mode):
+        self.render_mode = render_mode
+
+    def toggle_cull_backfaces(self, val=None):
+        if None is val:
+            val = not self.cull_backfaces
+
+        self.cull_backfaces = val
+
     def toggle_show_grid(self, val=None):
         if None is val:
             val = not self.show_grid
 
         self.show_grid = val
 
-    def update(self):
-        self.screen.fill(DEFAULT_BACKGROUND_COLOR)
+    def get_render_state(self):
+        """ everything the base layer depends on, compared between updates """
+        return (
+            self.viewport.get_state(),
+            self.show_grid,
+            self.show_normals,
+            self.cull_backfaces,
+            self.render_mode,
+            tuple(
+                (reference, model_placement.model, model_placement.model.version)
+                for reference,model_placement in self.scene.model_placements.items()
+            )
+        )
+
+    def get_model_geometry(self, model_placement):
+        """ arrays derived from the model, rebuilt when the model changes """
+        model = model_placement.model
+        key = (model, model.version)
+        entry = self.geometry_cache.get(model_placement.reference)
+        if None is not entry and entry["key"] == key:
+            return entry
+
+        vertices, face_edges, edge_faces, normals = model.to_edge_arrays()
+        edges, edge_ids = get_unique_edges(face_edges)
+
+        #shared edges are drawn once, chained into polylines so each one
+        #costs a single draw call. strips are stored end to end in one array,
+        #segment i runs from strip_points[i] to strip_points[i+1] and is
+        #drawn if strip_segments[i] (a row of edges, -1 between strips) is
+        strips = get_edge_strips(edges)
+        strip_points = np.array([i for strip in strips for i in strip + [-1]], dtype=np.intp)
+        segment_starts = strip_points[:-1]
+        segment_ends = strip_points[1:]
+        valid = (segment_starts >= 0) & (segment_ends >= 0)
+        edge_keys = edges[:,0].astype(np.int64) * len(vertices) + edges[:,1]
+        segment_keys = (
+            np.minimum(segment_starts, segment_ends).astype(np.int64) * len(vertices)
+            + np.maximum(segment_starts, segment_ends)
+        )
+        strip_segments = np.where(
+            valid,
+            np.searchsorted(edge_keys, segment_keys),
+            -1
+        ) if len(edges) else np.zeros(len(segment_keys), dtype=np.intp)
+
+        entry = {
+            "key": key,
+            "vertices": vertices,
+            "edges": edges,
+            "face_edges": face_edges,
+            "edge_faces": edge_faces,
+            "edge_ids": edge_ids,
+            "strip_points": strip_points,
+            "strip_segments": strip_segments,
+            "midpoints": model.get_face_midpoints(),
+            "unit_normals": model.get_unit_normals()
+        }
+        self.geometry_cache[model_placement.reference] = entry
+        return entry
+
+    def get_visible_faces(self, geometry, screen_coords, depths):
+        """ mask of faces that are worth drawing: in front of the camera,
+            overlapping the screen and (optionally) facing the camera
+        """
+        face_count = len(geometry["midpoints"])
+        face_edges = geometry["face_edges"]
+        edge_faces = geometry["edge_faces"]
+        starts = face_edges[:,0]
+
+        #a face is kept only if all of its points are in front of the camera
+        visible = np.ones(face_count, dtype=bool)
+        np.logical_and.at(visible, edge_faces, depths[starts] > NEAR_PLANE_DEPTH)
+
+        #screen bounds of every face against the screen rect
+        low = np.full((face_count,2), MAX_SCREEN_COORDINATE)
+        high = np.full((face_count,2), -MAX_SCREEN_COORDINATE)
+        np.minimum.at(low, edge_faces, screen_coords[starts])
+        np.maximum.at(high, edge_faces, screen_coords[starts])
+        visible &= np.all(high >= 0, axis=1)
+        visible &= (low[:,0] < self.dimensions[0]) & (low[:,1] < self.dimensions[1])
+
+        if self.cull_backfaces:
+            #normal and camera to face direction in view space, faces with
+            #no usable normal are always kept
+            rotation = self.viewport.get_view_matrix()
+            view_normals = np.dot(geometry["unit_normals"], rotation[:3,:3].T)
+            view_midpoints = np.dot(geometry["midpoints"], rotation[:3,:3].T) + rotation[:3,3]
+            visible &= np.einsum("ij,ij->i", view_normals, view_midpoints) <= 0
+
+        return visible
+
+    def get_projection(self, model_placement):
+        """ screen coordinates and visibility for a placement, recomputed
+            only when the model, the viewport or culling changes
+        """
+        model = model_placement.model
+        key = (model, model.version, self.viewport.get_state(), self.cull_backfaces)
+        entry = self.projection_cache.get(model_placement.reference)
+        if None is not entry and entry["key"] == key:
+            return entry
+
+        geometry = self.get_model_geometry(model_placement)
+        screen_coords, depths = self.viewport.project_array(geometry["vertices"], True)
+        visible_faces = self.get_visible_faces(geometry, screen_coords, depths)
+
+        #an edge is drawn when any face using it is visible
+        visible_edges = np.zeros(len(geometry["edges"]), dtype=bool)
+        np.logical_or.at(visible_edges, geometry["edge_ids"], visible_faces[geometry["edge_faces"]])
+
+        #split strips into runs of consecutive visible segments
+        segments = geometry["strip_segments"]
+        segment_visible = (segments >= 0) & visible_edges[np.maximum(segments, 0)]
+        changes = np.diff(np.concatenate(([0], segment_visible.astype(np.int8), [0])))
+        run_starts = np.flatnonzero(changes == 1)
+        run_ends = np.flatnonzero(changes == -1) + 1
+
+        #normals for visible faces, base and tip projected in one call
+        face_ids = np.flatnonzero(visible_faces)
+        midpoints = geometry["midpoints"][face_ids]
+        normal_coords = self.viewport.project_array(np.concatenate((
+            midpoints,
+            midpoints + geometry["unit_normals"][face_ids]*3
+        ))).tolist()
+
+        entry = {
+            "key": key,
+            "vertices": screen_coords.tolist(),
+            "runs": list(zip(run_starts.tolist(), run_ends.tolist())),
+            "used_vertices": np.unique(geometry["edges"][visible_edges]).tolist(),
+            "visible_faces": visible_faces,
+            "normal_starts": normal_coords[:len(midpoints)],
+            "normal_ends": normal_coords[len(midpoints):]
+        }
+        self.projection_cache[model_placement.reference] = entry
+        return entry
+
+    def get_solid_geometry(self, model_placement):
+        """ face loops for solid rendering, only built once solid mode is used
+            and kept with the rest of the model geometry
+        """
+        geometry = self.get_model_geometry(model_placement)
+        if "loop_coords" not in geometry:
+            coords, face_offsets, loop_offsets, normals = model_placement.model.to_loop_arrays()
+            geometry["loop_coords"] = coords
+            geometry["loop_offsets"] = np.asarray(loop_offsets)
+            geometry["point_faces"] = np.repeat(np.arange(len(face_offsets) - 1), np.diff(face_offsets))
+        return geometry
+
+    def draw_solid(self, surface):
+        """ flat shaded faces for every placement, rasterized in one pass """
+        rotation = self.viewport.get_view_matrix()[:3,:3]
+        coords = []
+        point_faces = []
+        loop_lengths = []
+        depths = []
+        colors = []
+        face_count = 0
+
+        for reference,model_placement in self.scene.model_placements.items():
+            geometry = self.get_solid_geometry(model_placement)
+            visible = self.get_projection(model_placement)["visible_faces"]
+            if 0 == len(geometry["loop_coords"]):
+                continue
+
+            screen_coords, point_depths = self.viewport.project_array(geometry["loop_coords"], True)
+            faces = geometry["point_faces"]
+            counts = np.bincount(faces, minlength=len(visible))
+            counts[counts == 0] = 1
+
+            #only whole loops of visible faces are kept
+            keep = visible[faces]
+            loop_offsets = geometry["loop_offsets"]
+            keep_loops = visible[faces[loop_offsets[:-1]]]
+
+            coords.append(screen_coords[keep])
+            point_faces.append(faces[keep] + face_count)
+            loop_lengths.append(np.diff(loop_offsets)[keep_loops])
+            depths.append(np.bincount(faces, weights=point_depths, minlength=len(visible)) / counts)
+            colors.append(shade_faces(np.dot(geometry["unit_normals"], rotation.T)))
+            face_count = face_count + len(visible)
+
+        if 0 == face_count:
+            return
+
+        rasterize_faces(
+            surface,
+            np.concatenate(coords),
+            np.concatenate(point_faces),
+            np.concatenate(([0], np.cumsum(np.concatenate(loop_lengths)))),
+            np.concatenate(depths),
+            np.concatenate(colors)
+        )
+
+    def draw_base_layer(self):
+        surface = self.base_layer
+        surface.fill(DEFAULT_BACKGROUND_COLOR)
 
         if self.show_grid:
-            self.draw_model_grid()
+            self.draw_model_grid(surface)
 
-        #make a list of active faces to render last
-        #so they appear above all other rendering
-        active_faces = []
+        if self.render_mode == RENDER_MODE_SOLID:
+            self.draw_solid(surface)
 
-        for reference,model_placement in self.scene.model_placements.items():
-            model = model_placement.model
+        #drop cache entries for models that left the scene
+        for cache in (self.geometry_cache, self.projection_cache):
+            for reference in list(cache.keys()):
+                if reference not in self.scene.model_placements:
+                    del cache[reference]
 
-            for index,face in enumerate(model.faces):
-                if self.show_normals:
-                    face_midpoint = face.get_midpoint()
-                    normal_origin = self.viewport.project_point(face_midpoint)
-                    normal_coords = (face.unit_normal*3) + np.array([face_midpoint.x,face_midpoint.y,face_midpoint.z])
-                    normal_coords = self.viewport.project_point(Point(normal_coords[0],normal_coords[1],normal_coords[2]))
+        for reference,model_placement in self.scene.model_placements.items():
+            geometry = self.get_model_geometry(model_placement)
+            projection = self.get_projection(model_placement)
 
+            if self.show_normals:
+                for start_coords,end_coords in zip(projection["normal_starts"], projection["normal_ends"]):
                     pygame.draw.line(
-                        self.screen,
+                        surface,
                         self.normal_color,
-                        normal_origin,
-                        normal_coords,
-                        1
-                    )
-
-                if index == model_placement.active_face:
-                    active_faces.append(face)
-
-                for edge in face.edges:
-                    start_coords,end_coords = self.viewport.project_point_list(edge.to_vector())
-
-                    pygame.draw.circle(
-                        self.screen,
-                        (1,1,1),
-                        start_coords,
-                        2,
-                        2
-                    )
-                    pygame.draw.line(self.screen,
-                        DEFAULT_EDGE_COLOR,
                         start_coords,
                         end_coords,
                         1
                     )
 
-        for face in active_faces:
-            face_points = self.viewport.project_point_list(face.to_vector())
+            if self.render_mode == RENDER_MODE_SOLID:
+                continue
+
+            #every vertex is projected once, strips look up their points
+            screen_coords = projection["vertices"]
+            strip_points = geometry["strip_points"].tolist()
+            for start,end in projection["runs"]:
+                pygame.draw.lines(surface,
+                    DEFAULT_EDGE_COLOR,
+                    False,
+                    [screen_coords[i] for i in strip_points[start:end]],
+                    1
+                )
+
+            #one marker per vertex, stamped in a single batched blit
+            marker_offset = VERTEX_MARKER_RADIUS
+            surface.blits(
+                [
+                    (self.vertex_marker, (screen_coords[i][0] - marker_offset, screen_coords[i][1] - marker_offset))
+                    for i in projection["used_vertices"]
+                ],
+                False
+            )
 
-            #draw this face to a new surface to support alpha transparency
-            #TODO, make surface as small as possible for faster blitting
-            #or use this surface for the whole redraw. could be faster
-            #than drawing to the main buffer
-            #also consider dbl buffering
-            s = pygame.Surface(self.dimensions, pygame.SRCALPHA)  # the size of your rect
-            s.fill((255,255,255,50))           # this fills the entire surface
+    def invalidate(self):
+        """ force a full redraw on the next update, e.g. after the window
+            was covered
+        """
+        self.base_layer_state = None
+
+    def update(self):
+        render_state = self.get_render_state()
+        full_redraw = render_state != self.base_layer_state
+        if full_redraw:
+            self.draw_base_layer()
+            self.base_layer_state = render_state
+            self.screen.blit(self.base_layer, (0,0))
+        else:
+            #only the overlay can have changed, put back what was under it
+            for rect in self.overlay_rects:
+                self.screen.blit(self.base_layer, rect, rect)
+
+        dirty_rects = self.overlay_rects
+        self.overlay_rects = self.draw_active_faces()
+
+        if full_redraw:
+            pygame.display.update()
+        else:
+            pygame.display.update(dirty_rects + self.overlay_rects)
+
+    def draw_active_faces(self):
+        """ draw active faces over everything else, with alpha transparency
+            returns the screen rects that were touched
+        """
+        screen_rect = self.screen.get_rect()
+        rects = []
+        for reference,model_placement in self.scene.model_placements.items():
+            if None is model_placement.active_face:
+                continue
+
+            face_points = self.viewport.project_array(
+                model_placement.get_active_face().to_vector()
+            )
+            low = face_points.min(axis=0)
+            high = face_points.max(axis=0)
+            rect = pygame.Rect(
+                int(low[0]), int(low[1]), int(high[0] - low[0]) + 1, int(high[1] - low[1]) + 1
+            ).clip(screen_rect)
+            if 0 == rect.width or 0 == rect.height:
+                continue
+
+            #the overlay is screen sized but only the face's bounding box is
+            #cleared, drawn and blitted
+            self.overlay.fill((0,0,0,0), rect)
             pygame.draw.polygon(
-                s, DEFAULT_ACTIVE_FACE_COLOR, face_points, 0
+                self.overlay, DEFAULT_ACTIVE_FACE_COLOR, face_points.tolist(), 0
             )
+            self.screen.blit(self.overlay, rect, rect)
+            rects.append(rect)
 
-            self.screen.blit(s, (0,0))
+        return rects
 
-        pygame.display.update()
+    def draw_model_grid(self, surface):
+        grid_x = np.arange(-10,10)*10
+        grid_coords = self.viewport.project_array(np.concatenate([
+            [[x,-5,100] for x in grid_x],
+            [[x,-5,-10] for x in grid_x],
+            [[x,-5,2000] for x in grid_x]
+        ])).tolist()
+        line_count = len(grid_x)
 
-    def draw_model_grid(self):
-        for i in range(-10,10):
+        for i in range(line_count):
             pygame.draw.circle(
-                self.screen,
+                surface,
                 (1,1,1),
-                self.viewport.project_point(Point(i*10,-5,100)),
+                grid_coords[i],
                 2,
                 2
             )
 
-            pygame.draw.line(self.screen,DEFAULT_GRID_COLOR,
-                self.viewport.project_point(Point(i*10,-5,-10)),
-                self.viewport.project_point(Point(i*10,-5,2000)),
+            pygame.draw.line(surface,DEFAULT_GRID_COLOR,
+                grid_coords[line_count + i],
+                grid_coords[2*line_count + i],
                 1
             )
 
@@ -214,50 +491,60 @@ class Viewport:
         self.h_fov = 1.042 # 60deg in radians
         self.perspective = DEFAULT_PERSPECTIVE
 
+    def get_view_matrix(self):
+        """ 4x4 homogeneous transform from model space into view space """
+        matrix = np.identity(4)
+        matrix[:3,:3] = PERSPECTIVE_MATRICES[self.perspective]
+        matrix[:3,3] = [self.offset[0], self.offset[1], -self.zoom_level]
+        return matrix
+
+    def get_projection_matrix(self):
+        """ 3x4 homogeneous transform from model space to screen space,
+            the result still has to be divided by its last coordinate
+        """
+        mid_x = self.dimensions[0]/2
+        mid_y = self.dimensions[1]/2
+        focal = mid_x / tan(self.h_fov/2)
+        screen = np.array([
+            [focal, 0, mid_x],
+            [0, -focal, mid_y],
+            [0, 0, 1]
+        ])
+        return np.dot(screen, self.get_view_matrix()[:3])
+
+    def project_array(self, points, with_depth=False):
+        """ Project an (n,3) array of points, returns (n,2) int screen coordinates
+            with_depth also returns the distance of each point in front of
+            the camera, anything <= 0 is behind it
+        """
+        points = np.asarray(points, dtype=float).reshape(-1,3)
+        matrix = self.get_projection_matrix()
+        projected = np.dot(points, matrix[:,:3].T) + matrix[:,3]
+
+        depth = projected[:,2].copy()
+        #cheap way to avoid div/zero, I guess
+        divisor = np.where(depth == 0, .001, depth)
+        coords = projected[:,:2] / divisor[:,None]
+        coords = np.clip(np.nan_to_num(coords), -MAX_SCREEN_COORDINATE, MAX_SCREEN_COORDINATE).astype(int)
+        if with_depth:
+            return coords, depth
+        return coords
+
+    def get_state(self):
+        """ hashable snapshot of everything that affects projection """
+        return (
+            self.zoom_level,
+            tuple(self.offset),
+            self.perspective,
+            tuple(self.dimensions),
+            self.h_fov
+        )
+
     def project_point(self,point):
         return self.project_point_list([point])[0]
 
-
     def project_point_list(self,point_list):
         """ Given a list of points, return the coordinates within this viewport """
-        mid_x = self.dimensions[0]/2
-        mid_y = self.dimensions[1]/2
-        fov_tan = tan(self.h_fov/2)
-
-        coordinate_list = []
-
-        #dirty trick to cast a 3d vector into a Point object
-        #if it is already a Point object, a redundant point is returned
-        for point in point_list:
-            if self.perspective == SCENE_PERSPECTIVE_FRONT:
-                point = Point(point[0],point[1],point[2])
-            elif self.perspective == SCENE_PERSPECTIVE_TOP:
-                point = Point(point[0],point[2],point[1])
-            elif self.perspective == SCENE_PERSPECTIVE_LEFT:
-                point = Point(-point[2],point[1],point[0])
-            elif self.perspective == SCENE_PERSPECTIVE_RIGHT:
-                point = Point(point[2],point[1],-point[0])
-            elif self.perspective == SCENE_PERSPECTIVE_BOTTOM:
-                point = Point(point[0],-point[2],point[1])
-            elif self.perspective == SCENE_PERSPECTIVE_BACK:
-                point = Point(-point[0],point[1],-point[2])
-
-            #cheap way to avoid div/zero, I guess
-            if point.z == 0:
-                z_actual = -.001
-            else:
-                z_actual = point.z
-
-            z_actual = z_actual - self.zoom_level
-            x_actual = point.x + self.offset[0]
-            y_actual = point.y + self.offset[1]
-
-            x = mid_x + x_actual / z_actual / fov_tan * mid_x
-            y = mid_y - y_actual / z_actual / fov_tan * mid_x
-
-            #x = np.clip(x,self.dimensions[0]-1,self.dimensions[0]+1)
-            #y = np.clip(y,self.dimensions[1]-1,self.dimensions[1]+1)
-            #todo deal w infinity x or y
-            coordinate_list.append((int(x),int(y)))
-
-        return coordinate_list
+        if not isinstance(point_list, np.ndarray):
+            point_list = [[point[0],point[1],point[2]] for point in point_list]
+        return [tuple(coords) for coords in self.project_array(point_list).tolist()]
@@ -0,0 +1,155 @@
+import os
+from xml.sax.saxutils import quoteattr, escape
+
+import numpy as np
+
+from geometry import get_first_loops
+from layout import pack_rectangles, get_face_bounds, DEFAULT_SHEET_SIZE, DEFAULT_PART_MARGIN
+
+#decimals written for every coordinate, model units are mm
+COORDINATE_PRECISION = 3
+NUMBER_FORMAT = "%%.%if" % COORDINATE_PRECISION
+POINT_FORMAT = NUMBER_FORMAT + "," + NUMBER_FORMAT
+
+SVG_HEADER = (
+    '<?xml version="1.0" encoding="utf-8" ?>\n'
+    '<svg baseProfile="full" version="1.1" xmlns="http://www.w3.org/2000/svg" '
+    'width="%smm" height="%smm" viewBox="0 0 %s %s">\n'
+)
+SVG_FOOTER = '</svg>\n'
+
+PART_STYLE = 'stroke="rgb(0,0,255)" fill="none" stroke-width=".5pt" fill-rule="evenodd"'
+LABEL_STYLE = 'font-size="6px" fill="rgb(200,0,0)"'
+
+def get_sheet_filename(filename, sheet):
+    """ the first sheet keeps filename, later ones get -2, -3 ... added """
+    if 0 == sheet:
+        return filename
+    root, extension = os.path.splitext(filename)
+    return "%s-%i%s" % (root, sheet + 1, extension)
+
+def get_outer_loop_centers(coords, face_offsets, loop_offsets):
+    """ (f,2) average point of the outer loop of every face, where labels go """
+    loop_offsets = np.asarray(loop_offsets)
+    first_loops = get_first_loops(face_offsets, loop_offsets)[:-1]
+    starts = loop_offsets[first_loops]
+    ends = loop_offsets[first_loops + 1]
+    sums = np.concatenate((np.zeros((1,2)), np.cumsum(coords, axis=0)))
+    return (sums[ends] - sums[starts]) / np.maximum(ends - starts, 1)[:,None]
+
+def get_path_data(coords, loop_offsets, first_loop, last_loop):
+    """ svg path data for loops first_loop..last_loop, one sub path each so
+        holes get cut out as well
+    """
+    return " ".join(
+        "M" + " L".join(POINT_FORMAT % tuple(point) for point in coords[start:end].tolist()) + " Z"
+        for start,end in zip(loop_offsets[first_loop:last_loop], loop_offsets[first_loop+1:last_loop+1])
+    )
+
+def export_svg(filename, placements, progress=None, sheet_size=DEFAULT_SHEET_SIZE,
+        margin=DEFAULT_PART_MARGIN, allow_rotation=True):
+    """ Pack the flattened faces of every placement onto sheet_size (mm)
+        sheets and save one svg per sheet, see get_sheet_filename. parts
+        bigger than a sheet get one of their own, sized to fit
+        bounds, label positions and the packing are worked out for every
+        part up front, then parts are written straight to the files one at a
+        time, nothing per part is kept around
+        placements: iterable of ModelPlacement
+        progress: optional callback(fraction, message), raising from it
+        abandons the export and leaves no files behind
+        sheets past the last one written, left from exporting more parts to
+        the same filename before, are removed
+        returns the filenames written
+    """
+    placements = list(placements)
+    flattened = []
+    lows = []
+    highs = []
+    centers = []
+    for placement_index,placement in enumerate(placements):
+        if None is not progress:
+            progress(.5 * placement_index / len(placements), "flattening " + placement.reference)
+
+        #flatten the whole model at once, then work on all faces together
+        coords, face_offsets, loop_offsets = placement.model.flatten()
+        loop_offsets = np.asarray(loop_offsets)
+        flattened.append((coords, get_first_loops(face_offsets, loop_offsets).tolist(), loop_offsets.tolist()))
+        low, high = get_face_bounds(coords, face_offsets)
+        lows.append(low)
+        highs.append(high)
+        centers.append(get_outer_loop_centers(coords, face_offsets, loop_offsets))
+
+    #parts numbered model after model, face after face
+    part_models = np.repeat(np.arange(len(placements)), [len(low) for low in lows])
+    part_faces = np.concatenate([np.arange(len(low)) for low in lows]) if lows else np.zeros(0, dtype=np.intp)
+    lows = np.concatenate(lows) if lows else np.zeros((0,2))
+    highs = np.concatenate(highs) if highs else np.zeros((0,2))
+    centers = np.concatenate(centers) if centers else np.zeros((0,2))
+
+    if None is not progress:
+        progress(.5, "packing %i parts" % len(part_faces))
+    sheets, positions, rotated, sheet_sizes = pack_rectangles(highs - lows, sheet_size, margin, allow_rotation)
+
+    #move each part's bounding box corner to its packed position, turned parts
+    #are rotated a quarter turn, (x,y) -> (-y,x), first
+    offsets = np.where(
+        rotated[:,None],
+        positions + np.stack((highs[:,1], -lows[:,0]), axis=1),
+        positions - lows
+    )
+
+    if 0 == len(sheet_sizes):
+        #nothing to export still gets an empty sheet
+        sheet_sizes = [tuple(sheet_size)]
+    sheet_count = len(sheet_sizes)
+    order = np.argsort(sheets, kind="stable")
+    sheet_starts = np.searchsorted(sheets[order], np.arange(sheet_count + 1))
+    filenames = [get_sheet_filename(filename, sheet) for sheet in range(sheet_count)]
+    #written next to the real files and renamed once every sheet is done
+    partial_filenames = [sheet_filename + ".part" for sheet_filename in filenames]
+
+    try:
+        for sheet in range(sheet_count):
+            with open(partial_filenames[sheet], "w", encoding="utf-8") as f:
+                width, height = sheet_sizes[sheet]
+                f.write(SVG_HEADER % (width, height, width, height))
+                for part in order[sheet_starts[sheet]:sheet_starts[sheet + 1]].tolist():
+                    placement_index = int(part_models[part])
+                    index = int(part_faces[part])
+                    placement = placements[placement_index]
+                    coords, first_loops, loop_offsets = flattened[placement_index]
+
+                    label = placement.reference + '-' + placement.hash_face_by_index(index)
+                    transform = "translate(%s)" % (POINT_FORMAT % tuple(offsets[part].tolist()))
+                    if rotated[part]:
+                        transform = transform + " rotate(90)"
+                    f.write('<g id=%s transform="%s"><path d="%s" %s />' % (
+                        quoteattr(label),
+                        transform,
+                        get_path_data(coords, loop_offsets, first_loops[index], first_loops[index + 1]),
+                        PART_STYLE
+                    ))
+                    x, y = centers[part].tolist()
+                    f.write('<text x="%s" y="%s" %s>%s</text></g>\n' % (
+                        NUMBER_FORMAT % x, NUMBER_FORMAT % y, LABEL_STYLE, escape(label)
+                    ))
+                f.write(SVG_FOOTER)
+
+            if None is not progress:
+                progress(.5 + .5 * (sheet + 1) / sheet_count, "writing " + filenames[sheet])
+
+        for partial_filename,sheet_filename in zip(partial_filenames, filenames):
+            os.replace(partial_filename, sheet_filename)
+    except:
+        for partial_filename in partial_filenames:
+            if os.path.exists(partial_filename):
+                os.remove(partial_filename)
+        raise
+
+    #sheets left over from an earlier export to the same name that needed more
+    sheet = sheet_count
+    while os.path.exists(get_sheet_filename(filename, sheet)):
+        os.remove(get_sheet_filename(filename, sheet))
+        sheet = sheet + 1
+
+    return filenames
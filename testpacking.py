@@ -0,0 +1,41 @@
+import numpy as np
+
+from layout import pack_rectangles
+
+sheet_size = (200, 150)
+margin = 2
+random = np.random.default_rng(1)
+#mostly small parts, some long thin ones and one too big for any sheet
+sizes = np.concatenate([
+    random.uniform(1, 40, (300,2)),
+    random.uniform([1,60], [8,140], (30,2)),
+    [[260, 40]]
+])
+
+for allow_rotation in (True, False):
+    sheets, positions, rotated, sheet_sizes = pack_rectangles(sizes, sheet_size, margin, allow_rotation)
+    placed = np.where(rotated[:,None], sizes[:,::-1], sizes)
+    assert allow_rotation or not rotated.any(), "rotated without being allowed"
+
+    #inside the sheet with a margin all around
+    bounds = np.array(sheet_sizes)[sheets]
+    assert np.all(positions >= margin - 1e-9), "part over the top or left edge"
+    assert np.all(positions + placed <= bounds - margin + 1e-9), "part over the bottom or right edge"
+
+    #no two parts on a sheet closer than the margin
+    for sheet in range(len(sheet_sizes)):
+        low = positions[sheets == sheet]
+        high = low + placed[sheets == sheet]
+        apart = (
+            (low[:,None,0] >= high[None,:,0] + margin - 1e-9) | (low[None,:,0] >= high[:,None,0] + margin - 1e-9) |
+            (low[:,None,1] >= high[None,:,1] + margin - 1e-9) | (low[None,:,1] >= high[:,None,1] + margin - 1e-9)
+        )
+        np.fill_diagonal(apart, True)
+        assert apart.all(), "parts overlap on sheet %i" % sheet
+
+    #the oversized part is alone on a sheet made to fit
+    big_sheet = sheets[-1]
+    assert 1 == np.sum(sheets == big_sheet)
+    assert (264, 44) == tuple(sheet_sizes[big_sheet])
+
+    print("%i parts on %i sheets (rotation %s), no overlaps" % (len(sizes), len(sheet_sizes), "on" if allow_rotation else "off"))
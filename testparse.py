@@ -0,0 +1,83 @@
+import os
+import tempfile
+
+import numpy as np
+
+from meshloader import model_from_file, read_binary_stl, STL_HEADER_SIZE
+
+source = os.path.join(os.path.dirname(os.path.abspath(__file__)), "source-files", "teapot.stl")
+with open(source, "rb") as f:
+    binary = f.read()
+vectors = np.array(read_binary_stl(source)["vectors"])
+
+#%.9g brings every float32 back exactly, so ascii copies weld the same way
+lines = ["solid teapot"]
+for triangle in vectors.tolist():
+    lines.append("  facet normal 0 0 0")
+    lines.append("    outer loop")
+    for vertex in triangle:
+        lines.append("      vertex %.9g %.9g %.9g" % tuple(vertex))
+    lines.append("    endloop")
+    lines.append("  endfacet")
+lines.append("endsolid teapot")
+ascii = ("\n".join(lines) + "\n").encode("ascii")
+#cut after the first vertex of the last facet
+last_facet = ascii.rindex(b"outer loop")
+truncated_ascii = ascii[:ascii.index(b"\n", ascii.index(b"vertex", last_facet)) + 1]
+
+solid_header = b"solid teapot exported as binary".ljust(STL_HEADER_SIZE - 4) + binary[STL_HEADER_SIZE - 4:]
+empty_binary = b"no triangles".ljust(STL_HEADER_SIZE - 4) + b"\x00" * 4
+variants = {
+    "ascii": ascii,
+    "upper case crlf": ascii.upper().replace(b"\n", b"\r\n"),
+    "padded binary": binary + b"\x00" * 100,
+    "binary with a solid header": solid_header,
+    "padded binary with a solid header": solid_header + b"\x00" * 100,
+}
+
+def same_faces(a, b):
+    return (
+        np.array_equal(a.mesh.vertices, b.mesh.vertices) and
+        np.array_equal(a.mesh.faces, b.mesh.faces) and
+        np.array_equal(a.mesh.normals, b.mesh.normals)
+    )
+
+def same_triangles(a, b):
+    """ same corners face by face, however the vertices are numbered. the
+        centering sums chunk by chunk, so other chunks round a little
+        differently
+    """
+    return (
+        np.allclose(a.mesh.vertices[a.mesh.faces], b.mesh.vertices[b.mesh.faces]) and
+        np.array_equal(a.mesh.normals, b.mesh.normals)
+    )
+
+def raises(filename):
+    try:
+        model_from_file(filename)
+    except Exception:
+        return True
+    return False
+
+expected = model_from_file(source)
+with tempfile.TemporaryDirectory() as directory:
+    def write(name, data):
+        filename = os.path.join(directory, name + ".stl")
+        with open(filename, "wb") as f:
+            f.write(data)
+        return filename
+
+    for name,data in variants.items():
+        filename = write(name, data)
+        assert same_faces(expected, model_from_file(filename)), name + " differs from the binary file"
+        #small chunks cut the ascii blocks between facets many times over,
+        #not where the binary chunks end, so only the numbering may change
+        assert same_triangles(expected, model_from_file(filename, chunk_size=100)), name + " differs in chunks"
+        print("%s: %i faces, same as the binary file" % (name, len(expected.mesh.faces)))
+
+    assert raises(write("truncated binary", binary[:-30])), "truncated binary should raise"
+    assert raises(write("truncated ascii", truncated_ascii)), "truncated ascii should raise"
+    assert raises(write("ascii without facets", b"solid empty\nendsolid empty\n")), "ascii without facets should raise"
+    assert raises(write("not an stl", b"just some text")), "text should raise"
+    assert 0 == len(model_from_file(write("binary without triangles", empty_binary)).mesh.faces)
+    print("truncated and empty files are caught")
@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+import numpy as np
+
+from geometry import Model
+from meshloader import model_from_file
+from placement import Scene
+from project import save_project, load_project, unmap_model, get_mapped_filename
+
+source_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "source-files")
+cube = model_from_file(os.path.join(source_directory, "testcube_20mm.stl"))
+teapot = model_from_file(os.path.join(source_directory, "teapot.stl"))
+#plain list of faces, saved as loops like a reduced model
+face_list = Model()
+for face in model_from_file(os.path.join(source_directory, "polygon_pyramid.stl")).faces:
+    face_list.add_face(face)
+
+scene = Scene()
+scene.add_model("mesh", cube, (1.5, 2, -3), None)
+scene.add_model("loops", teapot.get_reduced_model(1), (0, 0, 0), [[0, 1, 0], [-1, 0, 0], [0, 0, 1]])
+scene.add_model("list", face_list, None, None)
+scene.add_model("empty", Model(), (0, 0, 0), None)
+scene.get_model_placement("mesh").set_active_face_index(3)
+scene.get_model_placement("loops").set_active_face_index(100)
+viewport_settings = {"zoom_level": -120, "offset": [12.5, -4], "perspective": 2}
+
+def same_arrays(a, b):
+    return all(np.array_equal(np.asarray(x), np.asarray(y)) for x,y in zip(a, b))
+
+def check_scene(loaded, loaded_viewport_settings, expected):
+    assert viewport_settings == loaded_viewport_settings, "viewport settings differ"
+    assert list(expected) == list(loaded.model_placements), "placements differ"
+    for reference,placement in loaded.model_placements.items():
+        original, loop_arrays = expected[reference]
+        assert original.location == placement.location, reference + " moved"
+        assert original.orientation == placement.orientation, reference + " turned"
+        assert original.active_face == placement.active_face, reference + " active face differs"
+        assert same_arrays(loop_arrays, placement.model.to_loop_arrays()), reference + " geometry differs"
+        assert (None is original.model.mesh) == (None is placement.model.mesh), reference + " changed kind"
+
+#what every placement looked like before saving
+expected = {
+    placement.reference: (placement, placement.model.to_loop_arrays())
+    for placement in scene.get_placement_snapshot()
+}
+
+with tempfile.TemporaryDirectory() as directory:
+    filename = os.path.join(directory, "scene.fyp")
+    save_project(filename, scene.get_placement_snapshot(), viewport_settings)
+    loaded, loaded_viewport_settings = load_project(filename)
+    check_scene(loaded, loaded_viewport_settings, expected)
+    assert None is not get_mapped_filename(loaded.get_model("mesh").mesh.vertices), "mesh should be mapped"
+    print("%i placements saved and loaded, same geometry" % len(loaded.model_placements))
+
+    #saving over the project the scene was loaded from
+    for placement in loaded.model_placements.values():
+        placement.model = unmap_model(placement.model, filename)
+        arrays = placement.model.to_loop_arrays() if None is placement.model.mesh else (
+            placement.model.mesh.vertices, placement.model.mesh.faces, placement.model.mesh.normals
+        )
+        assert all(None is get_mapped_filename(array) for array in arrays), placement.reference + " still mapped"
+    assert cube is unmap_model(cube, filename), "models in memory should be left alone"
+
+    save_project(filename, loaded.get_placement_snapshot(), loaded_viewport_settings)
+    check_scene(loaded, loaded_viewport_settings, expected)
+    del loaded
+    reloaded, reloaded_viewport_settings = load_project(filename)
+    check_scene(reloaded, reloaded_viewport_settings, expected)
+    del reloaded
+    print("saved over the mapped project, same geometry")
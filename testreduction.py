@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+
+from geometry import Model, IndexedMesh, get_loop_area, get_first_loops
+from meshloader import model_from_file, indexed_mesh_from_vectors
+
+def plate_with_hole():
+    """ 3x3 grid of unit squares on z=0 with the middle one missing, two
+        triangles per square
+    """
+    vertices = np.array([[x,y,0] for y in range(4) for x in range(4)], dtype=float)
+    faces = []
+    for y in range(3):
+        for x in range(3):
+            if (1,1) == (x,y):
+                continue
+            a = y*4 + x
+            faces.append([a, a + 1, a + 5])
+            faces.append([a, a + 5, a + 4])
+    normals = np.tile([0,0,1.0], (len(faces),1))
+    return Model(IndexedMesh(vertices, np.array(faces), normals))
+
+def main():
+    reduced = plate_with_hole().get_reduced_model(1)
+    coords, face_offsets, loop_offsets, normals = reduced.to_loop_arrays()
+    first_loops = get_first_loops(face_offsets, loop_offsets)
+
+    #one face, outer boundary first then the hole
+    assert 1 == len(reduced.faces), "plate should reduce to one face"
+    assert [0, 2] == first_loops.tolist(), "plate should have two loops"
+    loops = [coords[start:end] for start,end in zip(loop_offsets[:-1], loop_offsets[1:])]
+    assert 9 == round(get_loop_area(np.concatenate((loops[0], loops[0][:1]))), 6), "outer loop should be 3x3"
+    assert 1 == round(get_loop_area(np.concatenate((loops[1], loops[1][:1]))), 6), "hole should be 1x1"
+    assert np.allclose(normals, [[0,0,1]])
+
+    #the face object sees the hole too
+    outer, holes = reduced.faces[0].to2D().get_loops()
+    assert 1 == len(holes)
+    print("plate with a hole: %i points in the outer loop, %i in the hole" % (len(loops[0]), len(loops[1])))
+
+    #a repeated triangle puts three faces on one edge, the reduction still
+    #chains loops instead of giving up
+    square = np.array([[0,0,0],[1,0,0],[1,1,0],[0,1,0]], dtype=float)
+    faces = np.array([[0,1,2],[0,2,3],[0,1,2]])
+    normals = np.tile([0,0,1.0], (3,1))
+    reduced = Model(IndexedMesh(square, faces, normals)).get_reduced_model(1)
+    assert 1 == len(reduced.faces), "square with a repeated triangle should reduce to one face"
+
+    #loading drops the repeat, whichever corner it starts from
+    vectors = square[[[0,1,2],[0,2,3],[1,2,0]]]
+    mesh = indexed_mesh_from_vectors(vectors, normals)
+    assert 2 == len(mesh.faces), "repeated triangle should be dropped"
+    coords, face_offsets, loop_offsets, normals = Model(mesh).get_reduced_model(1).to_loop_arrays()
+    assert 4 == len(coords) and [0, 4] == loop_offsets.tolist(), "square should reduce to one 4 point loop"
+    print("square with a repeated triangle: reduces to one face")
+
+    #splitting planes across processes gives the same polygons
+    model = model_from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "source-files", "teapot.stl"))
+    serial = model.get_reduced_model(1).to_loop_arrays()
+    parallel = model.get_reduced_model(2).to_loop_arrays()
+    assert all(np.array_equal(a, b) for a,b in zip(serial, parallel)), "parallel reduction differs"
+    print("teapot: %i faces, serial and parallel reduction agree" % (len(serial[1]) - 1))
+
+#the process pool needs the guard on platforms that spawn
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import numpy as np
+
+from meshloader import weld_vertices
+from geometry import UnionFind
+
+#clusters of points closer than the tolerance, with chains that are only
+#connected through their neighbours
+tolerance = .5
+random = np.random.default_rng(1)
+centers = random.uniform(0, 20, (60,3))
+points = np.concatenate([
+    centers[random.integers(0, len(centers), 400)] + random.normal(0, .2, (400,3)),
+    random.uniform(0, 20, (100,3)),
+    #exact duplicates, the common case in stl files
+    centers
+])
+
+vertices, inverse = weld_vertices(points, tolerance)
+
+#brute force single linkage: every pair within tolerance ends up together
+sets = UnionFind(len(points))
+distances = np.linalg.norm(points[:,None] - points[None,:], axis=2)
+for a,b in zip(*np.nonzero(distances <= tolerance)):
+    sets.union(int(a), int(b))
+expected = np.array([sets.find(i) for i in range(len(points))])
+
+#same grouping, whatever the labels
+same_expected = expected[:,None] == expected[None,:]
+same_welded = inverse[:,None] == inverse[None,:]
+assert np.array_equal(same_expected, same_welded), "weld groups differ from brute force"
+assert len(vertices) == len(np.unique(expected))
+
+#every point is snapped onto one of the input points of its own group
+snapped_onto = np.all(vertices[inverse][:,None] == points[None,:], axis=2)
+assert np.all(np.any(snapped_onto & same_expected, axis=1)), "point welded outside its group"
+
+print("welded %i points into %i vertices, matches brute force" % (len(points), len(vertices)))